@@ -0,0 +1,98 @@
+"""users unique (external_id, messenger_type)
+
+Уникальный ключ пользователя мессенджера, на который опирается upsert
+при регистрации (ON CONFLICT (external_id, messenger_type)). Индекс
+строится CONCURRENTLY, чтобы не блокировать запись в users, и затем
+становится ограничением без повторного построения.
+
+Миграцию можно запускать повторно: INVALID-индекс от прерванного
+построения пересоздаётся, уже существующее ограничение не трогается.
+Если в users есть дубли (external_id, messenger_type), миграция
+останавливается с примером дубля — их нужно убрать и запустить снова.
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001a"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UNIQUE_USER = "uq_users_external_id_messenger_type"
+
+
+# Дубли не дадут построить уникальный индекс; проверка до построения
+# объясняет причину вместо ошибки CREATE INDEX
+CHECK_DUPLICATES = f"""
+DO $$
+DECLARE
+    groups bigint;
+    sample record;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_constraint WHERE conname = '{UNIQUE_USER}' AND conrelid = 'users'::regclass) THEN
+        RETURN;
+    END IF;
+    SELECT count(*) INTO groups FROM (
+        SELECT 1 FROM users GROUP BY external_id, messenger_type HAVING count(*) > 1
+    ) AS duplicates;
+    IF groups > 0 THEN
+        SELECT external_id, messenger_type, count(*) AS n INTO sample
+        FROM users GROUP BY external_id, messenger_type HAVING count(*) > 1 LIMIT 1;
+        RAISE EXCEPTION 'users: % повторяющихся пар (external_id, messenger_type), например (%, %) — % строк. '
+            'Уберите дубли и повторите миграцию', groups, sample.external_id, sample.messenger_type, sample.n;
+    END IF;
+END $$
+"""
+
+ATTACH_CONSTRAINT = f"""
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = '{UNIQUE_USER}' AND conrelid = 'users'::regclass) THEN
+        ALTER TABLE users ADD CONSTRAINT {UNIQUE_USER} UNIQUE USING INDEX {UNIQUE_USER};
+    END IF;
+END $$
+"""
+
+
+def drop_invalid_index(name: str) -> None:
+    """
+    Удаляет индекс, оставшийся INVALID после прерванного CREATE INDEX CONCURRENTLY.
+
+    IF NOT EXISTS такой индекс пропустил бы. Вызывается внутри
+    autocommit_block; при генерации SQL (--sql) проверять нечего.
+    """
+    if op.get_context().as_sql:
+        return
+    invalid = op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND c.relnamespace = current_schema()::regnamespace AND NOT i.indisvalid"
+    ), {"name": name}).scalar()
+    if invalid:
+        op.execute(sa.text(f"DROP INDEX CONCURRENTLY {name}"))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.text(CHECK_DUPLICATES))
+    with op.get_context().autocommit_block():
+        drop_invalid_index(UNIQUE_USER)
+        op.create_index(
+            UNIQUE_USER, "users", ["external_id", "messenger_type"],
+            unique=True, postgresql_concurrently=True, if_not_exists=True,
+        )
+    # Готовый индекс становится ограничением без повторного построения
+    op.execute(sa.text(ATTACH_CONSTRAINT))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(UNIQUE_USER, "users", type_="unique")
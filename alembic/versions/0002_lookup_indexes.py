@@ -0,0 +1,62 @@
+"""lookup indexes
+
+Индексы под запросы репозиториев: поиск пользователя по account_id,
+аккаунта по username и email (поиск по (external_id, messenger_type)
+идёт по уникальному ключу из 0001a). Создаются CONCURRENTLY, чтобы не
+блокировать запись в рабочие таблицы; INVALID-индекс, оставшийся от
+прерванного запуска, пересоздаётся.
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-18 00:00:01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = (
+    ("ix_users_account_id", "users", ["account_id"]),
+    ("ix_accounts_username", "accounts", ["username"]),
+    ("ix_accounts_email", "accounts", ["email"]),
+)
+
+
+def drop_invalid_index(name: str) -> None:
+    """
+    Удаляет индекс, оставшийся INVALID после прерванного CREATE INDEX CONCURRENTLY.
+
+    IF NOT EXISTS такой индекс пропустил бы. Вызывается внутри
+    autocommit_block; при генерации SQL (--sql) проверять нечего.
+    """
+    if op.get_context().as_sql:
+        return
+    invalid = op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND c.relnamespace = current_schema()::regnamespace AND NOT i.indisvalid"
+    ), {"name": name}).scalar()
+    if invalid:
+        op.execute(sa.text(f"DROP INDEX CONCURRENTLY {name}"))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            drop_invalid_index(name)
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,24 @@
+from typing import Generic, List, Optional, TypeVar
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+# Размер страницы списков по умолчанию и верхняя граница, которую не превысит клиент
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+# Строк за одно чтение серверного курсора при выгрузке
+EXPORT_CHUNK_SIZE = 1000
+
+
+class PageDTO(BaseModel, Generic[T]):
+    """Страница списка, упорядоченного по id; next_cursor передаётся как cursor за следующей"""
+    items: List[T]
+    next_cursor: Optional[int] = None
+
+    @classmethod
+    def from_items(cls, items: List[T], limit: int) -> "PageDTO[T]":
+        """items — выборка из limit + 1 строк: лишняя строка значит, что есть следующая страница"""
+        if len(items) > limit:
+            items = items[:limit]
+            return cls(items=items, next_cursor=items[-1].id)
+        return cls(items=items)
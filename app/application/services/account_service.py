@@ -1,5 +1,5 @@
 import logging
-from typing import List, Optional, Tuple, Type
+from typing import Any, AsyncIterator, List, Mapping, Optional, Tuple, Type
 
 from app.domain.entities.account import Account
 from app.application.dto.account_dto import (
@@ -7,6 +7,7 @@ from app.application.dto.account_dto import (
     UpdateAccountDTO, 
     AccountResponseDTO
 )
+from app.application.dto.page_dto import DEFAULT_PAGE_SIZE, EXPORT_CHUNK_SIZE, MAX_PAGE_SIZE, PageDTO
 from app.application.dto.user_dto import CreateUserDTO, UserResponseDTO
 from app.application.mappers.account_mapper import AccountMapper
 from app.application.mappers.user_mapper import UserMapper
@@ -65,6 +66,29 @@ class AccountService:
             account_entities = await uow.account.get_all()
             return [AccountResponseDTO.from_entity(account) for account in account_entities]
 
+    async def get_accounts_page(
+        self,
+        after_id: Optional[int] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> PageDTO[AccountResponseDTO]:
+        """Страница аккаунтов после after_id"""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        async with self.uow_class() as uow:
+            account_entities = await uow.account.get_all(after_id=after_id, limit=limit + 1)
+            return PageDTO[AccountResponseDTO].from_items(
+                [AccountResponseDTO.from_entity(account) for account in account_entities], limit
+            )
+
+    async def export_accounts(
+        self,
+        after_id: Optional[int] = None,
+        chunk_size: int = EXPORT_CHUNK_SIZE
+    ) -> AsyncIterator[List[Mapping[str, Any]]]:
+        """Все аккаунты после after_id пачками строк; поля совпадают с AccountResponseDTO"""
+        async with self.uow_class() as uow:
+            async for rows in uow.account.iter_rows(after_id=after_id, chunk_size=chunk_size):
+                yield rows
+
     async def update_account(
         self, 
         account_id: int, 
@@ -117,7 +141,7 @@ class AccountService:
                 saved_account = await uow.account.create(account_entity)              
                 
                 # Создаем пользователя с привязкой к аккаунту
-                user_entity = self.user_mapper.create_dto_to_entity(user_dto, account_id=saved_account.id)
+                user_entity = self.user_mapper.from_create_dto(user_dto, account_id=saved_account.id)
                 saved_user = await uow.user.create(user_entity)
                 
                 return (
@@ -128,6 +152,31 @@ class AccountService:
                 await uow.rollback()
                 raise e
             
+    async def get_or_create_account_with_user(
+        self,
+        account_dto: CreateAccountDTO,
+        user_dto: CreateUserDTO
+    ) -> Tuple[AccountResponseDTO, UserResponseDTO, bool]:
+        """
+        Регистрация пользователя мессенджера: находит его или создаёт вместе с аккаунтом.
+
+        Атомарно и безопасно при одновременных вызовах; третий элемент — создан ли пользователь.
+        """
+        async with self.uow_class() as uow:
+            user, account, created = await uow.user.get_or_create_with_account(
+                external_id=user_dto.external_id,
+                messenger_type=user_dto.messenger_type.value,
+                account=self.account_mapper.create_dto_to_entity(account_dto),
+                username=user_dto.username,
+                first_name=user_dto.first_name,
+                last_name=user_dto.last_name,
+            )
+            return (
+                AccountResponseDTO.from_entity(account),
+                self.user_mapper.to_response_dto(user),
+                created
+            )
+            
     async def get_account_by_user_external_id(self, external_id: str):
         async with self.uow_class() as uow:
             account_entity = await uow.account.get_by_user_external_id(external_id)
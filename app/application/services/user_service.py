@@ -1,4 +1,6 @@
-from typing import List, Optional, Type
+from typing import Any, AsyncIterator, List, Mapping, Optional, Tuple, Type
+from app.application.dto.account_dto import AccountResponseDTO
+from app.application.dto.page_dto import DEFAULT_PAGE_SIZE, EXPORT_CHUNK_SIZE, MAX_PAGE_SIZE, PageDTO
 from app.application.dto.user_dto import CreateUserDTO, UpdateUserDTO, UserResponseDTO
 from app.application.mappers.user_mapper import UserMapper
 from app.infrastructure.db.uow import UnitOfWork
@@ -47,6 +49,22 @@ class UserService:
             )
             return self.user_mapper.to_response_dto(entity) if entity else None
 
+    async def get_identity(
+        self,
+        external_id: str,
+        messenger_type: MessengerType
+    ) -> Optional[Tuple[UserResponseDTO, AccountResponseDTO]]:
+        """Пользователь мессенджера и его аккаунт одним запросом"""
+        async with self.uow_class() as uow:
+            found = await uow.user.get_with_account(
+                external_id=external_id,
+                messenger_type=messenger_type.value
+            )
+            if found is None:
+                return None
+            user, account = found
+            return self.user_mapper.to_response_dto(user), AccountResponseDTO.from_entity(account)
+
     async def get_users_by_account_id(self, account_id: int) -> List[UserResponseDTO]:
         async with self.uow_class() as uow:
             entities = await uow.user.get_by_account_id(account_id)
@@ -57,6 +75,45 @@ class UserService:
             entities = await uow.user.get_by_messenger_type(messenger_type.value)
             return [self.user_mapper.to_response_dto(e) for e in entities]
 
+    async def get_users_page_by_messenger_type(
+        self,
+        messenger_type: MessengerType,
+        after_id: Optional[int] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> PageDTO[UserResponseDTO]:
+        """Страница пользователей мессенджера после after_id"""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        async with self.uow_class() as uow:
+            entities = await uow.user.get_by_messenger_type(messenger_type.value, after_id=after_id, limit=limit + 1)
+            return PageDTO[UserResponseDTO].from_items([self.user_mapper.to_response_dto(e) for e in entities], limit)
+
+    async def get_users_page_by_account_id(
+        self,
+        account_id: int,
+        after_id: Optional[int] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> PageDTO[UserResponseDTO]:
+        """Страница пользователей аккаунта после after_id"""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        async with self.uow_class() as uow:
+            entities = await uow.user.get_by_account_id(account_id, after_id=after_id, limit=limit + 1)
+            return PageDTO[UserResponseDTO].from_items([self.user_mapper.to_response_dto(e) for e in entities], limit)
+
+    async def export_users(
+        self,
+        messenger_type: Optional[MessengerType] = None,
+        after_id: Optional[int] = None,
+        chunk_size: int = EXPORT_CHUNK_SIZE
+    ) -> AsyncIterator[List[Mapping[str, Any]]]:
+        """Все пользователи (или пользователи мессенджера) после after_id пачками строк"""
+        async with self.uow_class() as uow:
+            if messenger_type is None:
+                chunks = uow.user.iter_rows(after_id=after_id, chunk_size=chunk_size)
+            else:
+                chunks = uow.user.iter_rows_by_messenger_type(messenger_type, after_id=after_id, chunk_size=chunk_size)
+            async for rows in chunks:
+                yield rows
+
     async def update_user(self, user_id: int, update_dto: UpdateUserDTO) -> Optional[UserResponseDTO]:
         async with self.uow_class() as uow:
             existing = await uow.user.get(user_id)
@@ -79,20 +136,6 @@ class UserService:
     async def get_or_create_user_from_telegram(self, tg_user, account_id: int) -> UserResponseDTO:
         async with self.uow_class() as uow:
 
-            # Проверяем аккаунт
-            account = await uow.account.get(account_id)
-            if not account:
-                raise ValueError("Аккаунт не найден")
-
-            # Ищем пользователя
-            existing = await uow.user.get_by_external_id(
-                external_id=str(tg_user.id),
-                messenger_type=MessengerType.TELEGRAM.value
-            )
-
-            if existing:
-                return self.user_mapper.to_response_dto(existing)
-
             # Создаём DTO
             dto = CreateUserDTO(
                 external_id=str(tg_user.id),
@@ -102,8 +145,8 @@ class UserService:
                 last_name=tg_user.last_name,
             )
 
-            # Маппинг + сохранение
+            # Поиск и вставка одним запросом; отсутствие аккаунта — ValueError
             entity = self.user_mapper.from_create_dto(dto, account_id)
-            saved = await uow.user.create(entity)
+            saved, _ = await uow.user.get_or_create(entity)
 
             return self.user_mapper.to_response_dto(saved)
@@ -37,6 +37,39 @@ class TelegramConfig(ConfigBase):
     bot_secret_token: str
     bot_id: int
     bot_webhooks_url: str
+    # Свой сервер Bot API (локальный telegram-bot-api или поддельный для нагрузочных тестов)
+    bot_api_url: str | None = None
+
+    # Исходящие вызовы Bot API: пул соединений и лимиты отправки
+    api_pool_size: int = 100
+    api_keepalive: float = 30.0
+    api_global_rate: float = 30.0
+    api_private_chat_rate: float = 1.0
+    api_group_chat_rate: float = 20 / 60
+    api_chat_burst: int = 3
+    # Сколько раз повторять вызов после 429, прежде чем отдать ошибку вызывающему
+    api_max_retries: int = 2
+
+    # sync — ответ Telegram после обработки апдейта, queue — сразу после постановки в очередь
+    webhook_mode: Literal["sync", "queue"] = "sync"
+    # Сбрасывать ли накопленные апдейты при регистрации вебхука (иначе рестарт их не теряет)
+    webhook_drop_pending: bool = False
+    # Число последовательных полос: апдейты одного чата всегда в одной полосе
+    webhook_workers: int = 8
+    webhook_queue_size: int = 1000
+    # Сколько ждать места в полной очереди, прежде чем ответить 429
+    webhook_ack_timeout: float = 1.0
+
+    # Повторные доставки одного update_id отбрасываются в пределах окна
+    webhook_dedup_backend: Literal["memory", "redis"] = "memory"
+    webhook_dedup_window: float = 3600.0
+    webhook_dedup_max_size: int = 100_000
+
+    # Кэш пользователей и аккаунтов отправителей; у каждого процесса свой,
+    # поэтому изменения из других воркеров видны не позже чем через TTL
+    identity_cache_ttl: float = 60.0
+    identity_cache_negative_ttl: float = 5.0
+    identity_cache_size: int = 10_000
 
 
 class RedisConfig(ConfigBase):
@@ -58,6 +91,61 @@ class DBConfig(ConfigBase):
 
     url: str
     pool_size: int = 10
+    # Сверх pool_size под пиковую нагрузку; закрываются при возврате в пул
+    max_overflow: int = 10
+    # Сколько ждать свободное соединение, прежде чем запрос упадёт
+    pool_timeout: float = 10.0
+    # Пересоздавать соединения старше pool_recycle секунд (-1 — никогда)
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    # Подготовленные выражения asyncpg на одно соединение
+    statement_cache_size: int = 100
+
+
+class AntispamConfig(ConfigBase):
+    model_config = SettingsConfigDict(
+        env_prefix="ANTISPAM_",
+        env_file=".env",
+    )
+
+    # memory — состояние в процессе, redis — общее для всех воркеров
+    backend: Literal["memory", "redis"] = "memory"
+    redis_prefix: str = "antispam"
+
+    state_max_keys: int = 100_000
+    state_ttl: float = 3600.0
+    state_shards: int = 16
+    # Сколько секунд воркер держит политику чата, прежде чем перечитать её у провайдера
+    policy_cache_ttl: float = 30.0
+
+    # Лимиты флуда: не больше *_limit сообщений за *_period секунд (0 — выключено)
+    flood_user_limit: int = 1
+    flood_user_period: float = 2.0
+    flood_chat_limit: int = 0
+    flood_chat_period: float = 1.0
+    flood_user_chat_limit: int = 0
+    flood_user_chat_period: float = 10.0
+
+    # Повторы: пользователь уже отправил repeat_limit похожих сообщений за repeat_window
+    repeat_limit: int = 3
+    repeat_window: float = 3600.0
+    # Рейд: похожий текст от raid_users других аккаунтов чата за raid_window
+    raid_users: int = 5
+    raid_window: float = 300.0
+    duplicate_max_distance: int = 7
+    # Сколько сообщений помнит индекс отпечатков (memory): нужно не меньше
+    # частоты сообщений × max(repeat_window, raid_window), иначе окна обрежутся
+    duplicate_index_size: int = 200_000
+
+    # Словарь запрещённых фраз и доменов (по одной на строку), перечитывается при изменении
+    banned_phrases_path: str | None = None
+    banned_phrases_reload_interval: float = 30.0
+
+    # Фоновые модерационные действия
+    actions_flush_interval: float = 0.2
+    actions_max_queue: int = 10_000
+    notice_cooldown: float = 60.0
+
 
 class WebConfig(ConfigBase):
     model_config = SettingsConfigDict(
@@ -66,6 +154,11 @@ class WebConfig(ConfigBase):
     )
     host: str = "localhost"
     port: int = 1255
+    # Число процессов uvicorn; вебхук регистрирует только ведущий (flock на leader_lock)
+    workers: int = 1
+    leader_lock: str = "/tmp/chatty-webhook.lock"
+    # Общий бюджет остановки от сигнала: ожидание запросов в uvicorn, затем очередь апдейтов и модерация
+    shutdown_timeout: float = 25.0
 
 
 # === ГЛАВНАЯ КОНФИГУРАЦИЯ ===
@@ -77,6 +170,7 @@ class Config(BaseModel):
     db: DBConfig
     redis: RedisConfig
     web: WebConfig
+    antispam: AntispamConfig
 
     @classmethod
     @lru_cache
@@ -94,5 +188,6 @@ class Config(BaseModel):
         db = DBConfig(_env_file=env_file)
         redis = RedisConfig(_env_file=env_file)
         web = WebConfig(_env_file=env_file)
+        antispam = AntispamConfig(_env_file=env_file)
 
-        return cls(env=env_cfg, telegram=telegram, db=db, redis=redis, web=web)
+        return cls(env=env_cfg, telegram=telegram, db=db, redis=redis, web=web, antispam=antispam)
@@ -0,0 +1,173 @@
+"""
+Метрики процесса в формате Prometheus.
+
+Все операции записи выполняются в event loop без блокировок: это обычные
+операции над dict и list, которые не прерываются другими корутинами.
+Значения, которые компоненты уже считают сами (stats()), не дублируются —
+они снимаются коллекторами в момент отдачи /metrics.
+
+При нескольких воркерах у каждого процесса свои метрики.
+"""
+from bisect import bisect_left
+from typing import Callable, Iterable, Sequence
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+Labels = tuple[str, ...]
+# Коллектор возвращает значение без меток или {значения меток: значение}
+CollectorFunc = Callable[[], float | dict[Labels, float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        values = self._values
+        values[labels] = values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(Metric):
+    """
+    Гистограмма с фиксированными корзинами.
+
+    observe — один bisect и три сложения; кумулятивные суммы по корзинам
+    считаются только при отдаче метрик.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [счётчики по корзинам + корзина +Inf, сумма]
+        self._series: dict[Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        bounds = [*self.buckets, float("inf")]
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count_ in zip(bounds, counts):
+                cumulative += count_
+                le = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            plain = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{plain} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{plain} {cumulative}")
+        return lines
+
+
+class Collected(Metric):
+    """Значения, которые снимаются функцией в момент отдачи метрик"""
+
+    def __init__(self, name: str, help: str, func: CollectorFunc, labelnames: Sequence[str] = (), kind: str = "gauge"):
+        super().__init__(name, help, labelnames)
+        self.kind = kind
+        self.func = func
+
+    def render(self) -> list[str]:
+        value = self.func()
+        samples = value if isinstance(value, dict) else {(): value}
+        lines = self.header()
+        for labels, sample in samples.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(sample)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            # Повторная регистрация (например, при пересоздании приложения) возвращает ту же метрику
+            if type(existing) is not type(metric) or isinstance(metric, Collected):
+                self._metrics[metric.name] = metric
+                return metric
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, func: CollectorFunc, labelnames: Sequence[str] = ()) -> None:
+        self._register(Collected(name, help, func, labelnames, "gauge"))
+
+    def counter_func(self, name: str, help: str, func: CollectorFunc, labelnames: Sequence[str] = ()) -> None:
+        """Счётчик, который компонент уже ведёт сам"""
+        self._register(Collected(name, help, func, labelnames, "counter"))
+
+    def render(self, names: Iterable[str] | None = None) -> str:
+        lines = []
+        for name, metric in self._metrics.items():
+            if names is None or name in names:
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Общий реестр процесса
+registry = Registry()
@@ -0,0 +1,132 @@
+import os
+import signal
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+from app.core.config.settings import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows: несколько воркеров не поддерживается
+    fcntl = None
+
+
+class LeaderLock:
+    """
+    Выбор ведущего процесса среди воркеров одного хоста.
+
+    Ведущий держит эксклюзивный flock на файле до завершения процесса;
+    если он упадёт, блокировку снимет ядро, и её подхватит другой воркер.
+    Без path (один процесс) ведущим всегда считается текущий процесс.
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path else None
+        self._fd: int | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        if self.path is None or fcntl is None:
+            self._fd = -1
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        if self._fd >= 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        self._fd = None
+
+
+class ShutdownDeadline:
+    """
+    Единый бюджет остановки процесса.
+
+    Отсчёт начинается с сигнала остановки, а не с lifespan shutdown: uvicorn
+    сначала сам ждёт открытые соединения (timeout_graceful_shutdown считается
+    от того же сигнала), и хук приложения получает только остаток бюджета.
+    Если остановка пришла не сигналом, отсчёт начинается с первого remaining().
+    """
+
+    def __init__(self, budget: float, clock: Callable[[], float] = time.monotonic):
+        self.budget = budget
+        self._clock = clock
+        self._deadline: float | None = None
+
+    @property
+    def started(self) -> bool:
+        return self._deadline is not None
+
+    def start(self) -> None:
+        if self._deadline is None:
+            self._deadline = self._clock() + self.budget
+
+    def remaining(self) -> float:
+        self.start()
+        return max(0.0, self._deadline - self._clock())
+
+    def watch_signals(self) -> None:
+        """Начинает отсчёт по SIGINT/SIGTERM; обработчики uvicorn вызываются как раньше"""
+        # Обработчики сигналов ставятся только из главного потока
+        if threading.current_thread() is not threading.main_thread():
+            return
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            previous = signal.getsignal(sig)
+            if not callable(previous):
+                continue
+
+            def handler(signum, frame, previous=previous):
+                self.start()
+                previous(signum, frame)
+
+            signal.signal(sig, handler)
+
+
+def process_local_state(config: Config) -> list[str]:
+    """
+    Состояние, которое живёт в памяти каждого процесса.
+
+    При нескольких воркерах апдейты одного чата попадают в разные процессы,
+    поэтому то, что должно видеть все апдейты, обязано жить в общем хранилище.
+    Кэш политик общий только через провайдера (с backend=redis — Redis):
+    локальная копия перечитывается не реже antispam.policy_cache_ttl, так что
+    изменение из другого воркера видно с такой задержкой. Словарь фраз каждый
+    воркер перечитывает из файла сам, очереди фоновых действий локальны намеренно.
+    """
+    issues = []
+    if config.antispam.backend == "memory":
+        issues.append("ANTISPAM_BACKEND=memory: флуд и повторы считались бы отдельно в каждом воркере")
+    if config.telegram.webhook_dedup_backend == "memory":
+        issues.append("TG_WEBHOOK_DEDUP_BACKEND=memory: повтор апдейта может прийти в другой воркер")
+    return issues
+
+
+def check_workers(config: Config) -> None:
+    """Проверяет, что конфигурация допускает web.workers процессов"""
+    if config.web.workers <= 1:
+        return
+    if fcntl is None:
+        raise RuntimeError("Несколько воркеров поддерживаются только на POSIX")
+    issues = process_local_state(config)
+    if issues:
+        raise RuntimeError(
+            f"Для WEB_WORKERS={config.web.workers} нужны общие хранилища:\n" + "\n".join(issues)
+        )
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, List, Optional
+from typing import Any, AsyncIterator, Generic, Mapping, TypeVar, List, Optional
 from pydantic import BaseModel
 
 T = TypeVar('T', bound=BaseModel)  # Domain Entity
@@ -16,9 +16,15 @@ class BaseRepository(ABC, Generic[T]):
         pass
     
     @abstractmethod
-    async def get_all(self) -> List[T]:
+    async def get_all(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[T]:
+        """Записи по возрастанию id; after_id и limit — страница для keyset-пагинации"""
         pass
     
+    @abstractmethod
+    def iter_rows(self, after_id: Optional[int] = None, chunk_size: int = 1000) -> AsyncIterator[List[Mapping[str, Any]]]:
+        """Все строки после after_id по возрастанию id пачками по chunk_size, без сборки сущностей"""
+        pass
+
     @abstractmethod
     async def update(self, id: int, entity: T) -> Optional[T]:
         pass
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Any, AsyncIterator, List, Mapping, Optional, Tuple
+from app.domain.entities.account import Account
 from app.domain.entities.user import User
+from app.domain.enums.messenger_type import MessengerType
 from .base import BaseRepository
 
 class UserRepository(BaseRepository[User], ABC):
@@ -11,6 +13,33 @@ class UserRepository(BaseRepository[User], ABC):
         pass
     
     @abstractmethod
-    async def get_by_account_id(self, account_id: int) -> List[User]:
+    async def get_by_account_id(
+        self, account_id: int, after_id: Optional[int] = None, limit: Optional[int] = None
+    ) -> List[User]:
+        pass
+
+    @abstractmethod
+    async def get_with_account(self, external_id: str, messenger_type: str) -> Optional[Tuple[User, Account]]:
+        pass
+
+    @abstractmethod
+    async def get_or_create_with_account(
+        self,
+        external_id: str,
+        messenger_type: str,
+        account: Account,
+        username: Optional[str] = None,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+    ) -> Tuple[User, Account, bool]:
+        pass
+
+    @abstractmethod
+    async def get_or_create(self, user: User) -> Tuple[User, bool]:
+        pass
+
+    @abstractmethod
+    def iter_rows_by_messenger_type(
+        self, messenger_type: MessengerType, after_id: Optional[int] = None, chunk_size: int = 1000
+    ) -> AsyncIterator[List[Mapping[str, Any]]]:
         pass
-    
\ No newline at end of file
@@ -14,8 +14,8 @@ class AccountModel(BaseModel):
     __tablename__ = "accounts"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True ,index=True)
-    email: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
-    username: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    email: Mapped[Optional[str]] = mapped_column(String(50), nullable=True, index=True)
+    username: Mapped[Optional[str]] = mapped_column(String(50), nullable=True, index=True)
     first_name: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     last_name: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     phone: Mapped[Optional[str]] = mapped_column(String(12), nullable=True)
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
-from sqlalchemy import ForeignKey, Integer, String, DateTime, Enum, text
+from sqlalchemy import ForeignKey, Index, Integer, String, DateTime, Enum, UniqueConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.domain.enums.messenger_type import MessengerType
 from app.infrastructure.db.models import BaseModel
@@ -12,6 +12,12 @@ if TYPE_CHECKING:
 
 class UserModel(BaseModel):
     __tablename__ = "users"
+    # Один пользователь мессенджера — одна запись; на этот ключ опирается upsert при регистрации
+    __table_args__ = (
+        UniqueConstraint("external_id", "messenger_type", name="uq_users_external_id_messenger_type"),
+        # Страницы списка пользователей мессенджера (keyset по id)
+        Index("ix_users_messenger_type_id", "messenger_type", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     external_id: Mapped[str] = mapped_column(String)
@@ -19,7 +25,7 @@ class UserModel(BaseModel):
     last_name: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     username: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     messenger_type: Mapped[MessengerType] =  mapped_column(Enum(MessengerType))
-    account_id: Mapped[int] = mapped_column(Integer, ForeignKey("accounts.id"))
+    account_id: Mapped[int] = mapped_column(Integer, ForeignKey("accounts.id"), index=True)
     created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=text("TIMEZONE('Europe/Moscow', NOW())"))
 
     account: Mapped["AccountModel"]= relationship("AccountModel", back_populates="users")
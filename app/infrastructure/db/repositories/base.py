@@ -1,6 +1,6 @@
-from typing import Generic, TypeVar, List, Optional, Type
+from typing import Any, AsyncIterator, Generic, Mapping, TypeVar, List, Optional, Type
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Select, select
 
 from app.domain.repositories.base import BaseRepository
 from app.domain.repositories.interfaces import IEntityMapper
@@ -34,12 +34,35 @@ class BaseRepositoryImpl(BaseRepository[T], Generic[T, M]):
         model = result.scalar_one_or_none()
         return self.mapper.to_entity(model)
     
-    async def get_all(self) -> List[T]:
-        stmt = select(self.model_class)
+    def _page(self, stmt: Select, after_id: Optional[int], limit: Optional[int]) -> Select:
+        """Keyset-пагинация по id: страница читается по индексу, без OFFSET"""
+        stmt = stmt.order_by(self.model_class.id)
+        if after_id is not None:
+            stmt = stmt.where(self.model_class.id > after_id)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return stmt
+
+    async def get_all(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[T]:
+        stmt = self._page(select(self.model_class), after_id, limit)
         result = await self.session.execute(stmt)
         models = result.scalars().all()
         return [self.mapper.to_entity(model) for model in models]
     
+    async def iter_rows(
+        self, after_id: Optional[int] = None, chunk_size: int = 1000, *criteria
+    ) -> AsyncIterator[List[Mapping[str, Any]]]:
+        """
+        Серверный курсор: в памяти не больше chunk_size строк.
+
+        Строки — значения колонок таблицы без ORM-объектов и сущностей;
+        criteria — дополнительные условия WHERE.
+        """
+        stmt = self._page(select(*self.model_class.__table__.c).where(*criteria), after_id, None)
+        result = await self.session.stream(stmt.execution_options(yield_per=chunk_size))
+        async for partition in result.mappings().partitions():
+            yield partition
+
     async def update(self, id: int, entity: T) -> Optional[T]:
         stmt = select(self.model_class).where(self.model_class.id == id)
         result = await self.session.execute(stmt)
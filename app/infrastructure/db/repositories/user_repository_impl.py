@@ -1,11 +1,16 @@
-from typing import List, Optional
-from sqlalchemy import select
+from typing import Any, AsyncIterator, List, Mapping, Optional, Tuple
+from sqlalchemy import exists, literal, select, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.domain.entities.account import Account
 from app.domain.entities.user import User
 from app.domain.enums.messenger_type import MessengerType
 from app.domain.repositories.user import UserRepository
+from app.infrastructure.db.models.account_model import AccountModel
 from app.infrastructure.db.models.user_model import UserModel
+from app.infrastructure.db.mappers.account_mapper import AccountDbMapper
 from app.infrastructure.db.mappers.user_mapper import UserDbMapper
 from .base import BaseRepositoryImpl
 
@@ -28,17 +33,161 @@ class UserRepositoryImpl(BaseRepositoryImpl[User, UserModel], UserRepository):
         result = await self.session.execute(stmt)
         model = result.scalar_one_or_none()
         return self.mapper.to_entity(model)
+
+    async def get_with_account(self, external_id: str, messenger_type: str) -> Optional[Tuple[User, Account]]:
+        """Пользователь вместе с аккаунтом одним запросом"""
+        stmt = (
+            select(self.model_class, AccountModel)
+            .join(AccountModel, AccountModel.id == self.model_class.account_id)
+            .where(
+                self.model_class.external_id == external_id,
+                self.model_class.messenger_type == messenger_type
+            )
+        )
+        result = await self.session.execute(stmt)
+        row = result.one_or_none()
+        if row is None:
+            return None
+        user_model, account_model = row
+        return self.mapper.to_entity(user_model), AccountDbMapper().to_entity(account_model)
+    
+    async def get_or_create_with_account(
+        self,
+        external_id: str,
+        messenger_type: str,
+        account: Account,
+        username: Optional[str] = None,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+    ) -> Tuple[User, Account, bool]:
+        """
+        Находит пользователя мессенджера или создаёт его вместе с аккаунтом.
+
+        Один запрос (PostgreSQL): CTE вставляет аккаунт, только если пользователя
+        ещё нет, а пользователя — с ON CONFLICT DO NOTHING по
+        (external_id, messenger_type). Если одновременный запрос успел первым,
+        результат пуст: транзакция откатывается вместе с лишним аккаунтом,
+        и пользователь читается вторым запросом. Третий элемент — создан ли он.
+        """
+        users = self.model_class.__table__
+        accounts = AccountModel.__table__
+        messenger = MessengerType(messenger_type)
+        key = (users.c.external_id == external_id) & (users.c.messenger_type == messenger)
+
+        new_account = (
+            insert(accounts)
+            .from_select(
+                ["email", "phone", "username", "first_name", "last_name"],
+                select(
+                    literal(account.email, accounts.c.email.type),
+                    literal(account.phone, accounts.c.phone.type),
+                    literal(account.username, accounts.c.username.type),
+                    literal(account.first_name, accounts.c.first_name.type),
+                    literal(account.last_name, accounts.c.last_name.type),
+                ).where(~exists().where(key)),
+            )
+            .returning(*accounts.c)
+            .cte("new_account")
+        )
+        new_user = (
+            insert(users)
+            .from_select(
+                ["external_id", "messenger_type", "username", "first_name", "last_name", "account_id"],
+                select(
+                    literal(external_id, users.c.external_id.type),
+                    literal(messenger, users.c.messenger_type.type),
+                    literal(username, users.c.username.type),
+                    literal(first_name, users.c.first_name.type),
+                    literal(last_name, users.c.last_name.type),
+                    new_account.c.id,
+                ),
+            )
+            .on_conflict_do_nothing(index_elements=["external_id", "messenger_type"])
+            .returning(*users.c)
+            .cte("new_user")
+        )
+        stmt = union_all(
+            select(new_user, new_account, literal(True).label("created"))
+            .join(new_account, new_account.c.id == new_user.c.account_id),
+            select(users, accounts, literal(False))
+            .join(accounts, accounts.c.id == users.c.account_id)
+            .where(key),
+        )
+
+        row = (await self.session.execute(stmt)).one_or_none()
+        if row is None:
+            await self.session.rollback()
+            found_user, found_account = await self.get_with_account(external_id, messenger_type)
+            return found_user, found_account, False
+
+        user_values = dict(zip(users.c.keys(), row[:len(users.c)]))
+        account_values = dict(zip(accounts.c.keys(), row[len(users.c):-1]))
+        return (
+            self.mapper.to_entity(self.model_class(**user_values)),
+            AccountDbMapper().to_entity(AccountModel(**account_values)),
+            row[-1],
+        )
     
-    async def get_by_account_id(self, account_id: int) -> List[User]:
-        """Получение всех пользователей аккаунта"""
-        stmt = select(self.model_class).where(self.model_class.account_id == account_id)
+    async def get_or_create(self, user: User) -> Tuple[User, bool]:
+        """
+        Находит пользователя по (external_id, messenger_type) или создаёт его одним запросом.
+
+        Второй элемент — создан ли пользователь. Несуществующий аккаунт — ValueError.
+        """
+        users = self.model_class.__table__
+        key = (users.c.external_id == user.external_id) & (users.c.messenger_type == user.messenger_type)
+        new_user = (
+            insert(users)
+            .values(
+                external_id=user.external_id,
+                messenger_type=user.messenger_type,
+                username=user.username,
+                first_name=user.first_name,
+                last_name=user.last_name,
+                account_id=user.account_id,
+            )
+            .on_conflict_do_nothing(index_elements=["external_id", "messenger_type"])
+            .returning(*users.c)
+            .cte("new_user")
+        )
+        stmt = union_all(
+            select(new_user, literal(True).label("created")),
+            select(users, literal(False)).where(key),
+        )
+        try:
+            row = (await self.session.execute(stmt)).one_or_none()
+        except IntegrityError:
+            raise ValueError("Аккаунт не найден")
+        if row is None:
+            # Одновременная вставка: её результат виден только следующему запросу
+            return await self.get_by_external_id(user.external_id, user.messenger_type.value), False
+        model = self.model_class(**dict(zip(users.c.keys(), row[:-1])))
+        return self.mapper.to_entity(model), row[-1]
+
+    async def get_by_account_id(
+        self, account_id: int, after_id: Optional[int] = None, limit: Optional[int] = None
+    ) -> List[User]:
+        """Получение пользователей аккаунта"""
+        stmt = self._page(
+            select(self.model_class).where(self.model_class.account_id == account_id), after_id, limit
+        )
         result = await self.session.execute(stmt)
         models = result.scalars().all()
         return [self.mapper.to_entity(model) for model in models]
     
-    async def get_by_messenger_type(self, messenger_type: MessengerType) -> List[User]:
+    async def get_by_messenger_type(
+        self, messenger_type: MessengerType, after_id: Optional[int] = None, limit: Optional[int] = None
+    ) -> List[User]:
         """Получение пользователей по типу мессенджера"""
-        stmt = select(self.model_class).where(self.model_class.messenger_type == messenger_type)
+        stmt = self._page(
+            select(self.model_class).where(self.model_class.messenger_type == messenger_type), after_id, limit
+        )
         result = await self.session.execute(stmt)
         models = result.scalars().all()
-        return [self.mapper.to_entity(model) for model in models]
\ No newline at end of file
+        return [self.mapper.to_entity(model) for model in models]
+
+    def iter_rows_by_messenger_type(
+        self, messenger_type: MessengerType, after_id: Optional[int] = None, chunk_size: int = 1000
+    ) -> AsyncIterator[List[Mapping[str, Any]]]:
+        """Строки пользователей мессенджера пачками через серверный курсор"""
+        return self.iter_rows(after_id, chunk_size, self.model_class.messenger_type == messenger_type)
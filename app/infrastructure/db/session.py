@@ -1,18 +1,131 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from app.core.config.settings import Config
+import logging
+from time import perf_counter
 
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.config.settings import Config, DBConfig
+from app.core.metrics import registry
 
 
-config = Config.load()
-
-engine = create_async_engine(
-    url=config.db.url,
-    future=True,
-    echo=False
+POOL_WAIT = registry.histogram(
+    "db_pool_wait_seconds",
+    "Ожидание соединения из пула БД",
+)
+POOL_HOLD = registry.histogram(
+    "db_pool_hold_seconds",
+    "Сколько соединение было выдано из пула",
 )
+POOL_TIMEOUTS = registry.counter("db_pool_timeouts_total", "Соединение не выдано за pool_timeout")
+POOL_CONNECTS = registry.counter("db_pool_connects_total", "Новые соединения с БД")
+POOL_INVALIDATED = registry.counter("db_pool_invalidated_total", "Соединения, сброшенные после ошибки")
+
+# Ожидание дольше этого попадает в лог: хендлерам не хватает соединений
+SLOW_WAIT = 0.1
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Пул, который меряет ожидание свободного соединения"""
+
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_TIMEOUTS.inc()
+            logging.warning(
+                f"Пул БД исчерпан: {self.checkedout()} соединений выдано, ожидание дольше {self._timeout} с"
+            )
+            raise
+        finally:
+            waited = perf_counter() - started
+            POOL_WAIT.observe(waited)
+            if waited > SLOW_WAIT:
+                logging.debug(f"Ожидание соединения БД {waited:.3f} с")
+
+
+def _listen(engine: AsyncEngine) -> None:
+    pool = engine.sync_engine.pool
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        POOL_CONNECTS.inc()
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = perf_counter()
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            POOL_HOLD.observe(perf_counter() - started)
+
+    @event.listens_for(pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        POOL_INVALIDATED.inc()
 
+    registry.gauge("db_pool_size", "Размер пула БД без overflow", lambda: pool.size())
+    registry.gauge("db_pool_checked_out", "Соединения, выданные из пула", lambda: pool.checkedout())
+    registry.gauge("db_pool_checked_in", "Свободные соединения в пуле", lambda: pool.checkedin())
+    # overflow() отрицателен, пока пул не заполнен до pool_size
+    registry.gauge("db_pool_overflow", "Соединения сверх pool_size", lambda: max(0, pool.overflow()))
+
+
+def create_engine(config: DBConfig) -> AsyncEngine:
+    """Движок с настройками пула из конфигурации и метриками пула"""
+    options = {}
+    connect_args = {}
+    if config.url.startswith("postgresql+asyncpg"):
+        # Кэш подготовленных выражений asyncpg на каждом соединении
+        connect_args["prepared_statement_cache_size"] = config.statement_cache_size
+    if ":memory:" not in config.url:
+        options.update(
+            poolclass=InstrumentedPool,
+            pool_size=config.pool_size,
+            max_overflow=config.max_overflow,
+            pool_timeout=config.pool_timeout,
+            pool_recycle=config.pool_recycle,
+            pool_pre_ping=config.pool_pre_ping,
+        )
+    engine = create_async_engine(
+        url=config.url,
+        future=True,
+        echo=False,
+        connect_args=connect_args,
+        **options,
+    )
+    if isinstance(engine.sync_engine.pool, InstrumentedPool):
+        _listen(engine)
+    return engine
+
+
+_engine: AsyncEngine | None = None
+
+# Привязывается к движку в init_engine; UnitOfWork берёт сессии отсюда
 SessionLocal = async_sessionmaker(
-    engine,
     expire_on_commit=False,
     class_=AsyncSession
-)
\ No newline at end of file
+)
+
+
+def init_engine(config: DBConfig) -> AsyncEngine:
+    """Создаёт движок процесса при запуске приложения; повторный вызов возвращает его же"""
+    global _engine
+    if _engine is None:
+        _engine = create_engine(config)
+        SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+def get_engine() -> AsyncEngine:
+    """Движок процесса; скрипты без create_app получают его из Config.load()"""
+    return init_engine(Config.load().db)
+
+
+async def dispose_engine() -> None:
+    global _engine
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
@@ -2,11 +2,14 @@ from typing import Any, Dict, Type
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.infrastructure.db.repositories import AccountRepositoryImpl, UserRepositoryImpl
-from app.infrastructure.db.session import SessionLocal
+from app.infrastructure.db.session import SessionLocal, get_engine
 
 
 class UnitOfWork:
     def __init__(self, session_factory=SessionLocal):
+        if session_factory is SessionLocal:
+            # Вне приложения (скрипты) движок создаётся при первом обращении
+            get_engine()
         self._session_factory = session_factory
         self.session: AsyncSession | None = None
         self._repositories: Dict[str, Any] = {}
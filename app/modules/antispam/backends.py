@@ -0,0 +1,149 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Sequence
+
+from app.core.config.settings import AntispamConfig
+from .fingerprint import DuplicateIndex, Fingerprint
+from .ratelimit import FloodLimiter, Limit
+from .state import StoreStats
+
+if TYPE_CHECKING:
+    from app.core.config.settings import RedisConfig
+    from .policy import PolicySettings
+
+
+@dataclass(frozen=True)
+class Thresholds:
+    """Пороги правил, зависящих от состояния"""
+    user: Limit | None = None
+    chat: Limit | None = None
+    user_chat: Limit | None = None
+    repeat_limit: int = 3
+    repeat_window: float = 3600.0
+    raid_users: int = 5
+    raid_window: float = 300.0
+    max_distance: int = 7
+
+    @classmethod
+    def from_settings(cls, settings: "PolicySettings") -> "Thresholds":
+        return cls(
+            user=Limit(settings.flood_user_limit, settings.flood_user_period),
+            chat=Limit(settings.flood_chat_limit, settings.flood_chat_period),
+            user_chat=Limit(settings.flood_user_chat_limit, settings.flood_user_chat_period),
+            repeat_limit=settings.repeat_limit,
+            repeat_window=settings.repeat_window,
+            raid_users=settings.raid_users,
+            raid_window=settings.raid_window,
+            max_distance=settings.duplicate_max_distance,
+        )
+
+    @property
+    def limits(self) -> dict[str, Limit]:
+        """Включённые лимиты флуда в порядке проверки"""
+        scoped = {"user_chat": self.user_chat, "user": self.user, "chat": self.chat}
+        return {
+            scope: limit for scope, limit in scoped.items()
+            if limit is not None and limit.count > 0
+        }
+
+
+@dataclass(frozen=True)
+class StateQuery:
+    user_id: int
+    chat_id: int
+    # None — отпечаток не нужен (текст пустой или уже сработало локальное правило)
+    fingerprint: Fingerprint | None
+    thresholds: Thresholds
+    # Локальные правила чисты — отпечаток можно записать, если пройдут и остальные
+    record: bool = True
+    # Время сообщения (для повтора истории); None — текущее время хранилища
+    timestamp: float | None = None
+
+
+@dataclass(frozen=True)
+class StateVerdict:
+    flood: str | None = None
+    same_user: int = 0
+    distinct_users: int = 0
+    repeated: bool = False
+    raid: bool = False
+
+
+class StateBackend(ABC):
+    """
+    Хранилище состояния антиспама.
+
+    check_and_record за одно обращение проверяет лимиты флуда и повторы,
+    а для чистого сообщения сразу записывает его отпечаток.
+    """
+
+    @abstractmethod
+    async def check_and_record(self, query: StateQuery) -> StateVerdict:
+        pass
+
+    async def check_and_record_many(self, queries: Sequence[StateQuery]) -> list[StateVerdict]:
+        """Пакетная проверка; результат совпадает с последовательными вызовами"""
+        return [await self.check_and_record(query) for query in queries]
+
+    def stats(self) -> dict[str, StoreStats]:
+        return {}
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryBackend(StateBackend):
+    """Состояние в памяти процесса"""
+
+    def __init__(self, config: AntispamConfig):
+        self.limiter = FloodLimiter(
+            max_keys=config.state_max_keys,
+            shards=config.state_shards,
+            idle_ttl=config.state_ttl,
+        )
+        # Отпечатки недавних сообщений для поиска повторов и рейдов
+        self.duplicates = DuplicateIndex(
+            window=max(config.state_ttl, config.repeat_window, config.raid_window),
+            max_entries=config.duplicate_index_size,
+        )
+
+    async def check_and_record(self, query: StateQuery) -> StateVerdict:
+        # Без await внутри: запрос обрабатывается атомарно относительно event loop
+        t = query.thresholds
+        now = query.timestamp
+        flood = self.limiter.check(query.user_id, query.chat_id, t.limits, now)
+        fp = query.fingerprint
+        if fp is None:
+            return StateVerdict(flood=flood)
+
+        # Счёт нужен только до порога: обход останавливается, как только он набран
+        match = self.duplicates.match(
+            fp, query.user_id, query.chat_id,
+            t.repeat_window, t.raid_window, t.repeat_limit, t.raid_users, t.max_distance, now,
+        )
+        verdict = StateVerdict(
+            flood=flood,
+            same_user=match.same_user,
+            distinct_users=match.distinct_users,
+            repeated=match.same_user >= t.repeat_limit,
+            raid=match.distinct_users >= t.raid_users,
+        )
+        if query.record and not (flood or verdict.repeated or verdict.raid):
+            self.duplicates.record(fp, query.user_id, query.chat_id, now)
+        return verdict
+
+    def stats(self) -> dict[str, StoreStats]:
+        stats = {f"flood_{scope}": s for scope, s in self.limiter.stats().items()}
+        stats["duplicates"] = self.duplicates.stats()
+        return stats
+
+
+def create_backend(config: AntispamConfig, redis_config: "RedisConfig | None" = None) -> StateBackend:
+    if config.backend == "redis":
+        # redis нужен только для этого режима
+        from .redis_backend import RedisBackend
+
+        if redis_config is None:
+            raise ValueError("Для backend=redis нужна конфигурация Redis")
+        return RedisBackend.from_config(redis_config, config)
+    return MemoryBackend(config)
@@ -0,0 +1,162 @@
+import re
+from dataclasses import dataclass
+from functools import cached_property
+from time import perf_counter_ns
+from typing import TYPE_CHECKING, Callable, Iterable
+
+from .fingerprint import Fingerprint
+
+if TYPE_CHECKING:
+    from .backends import StateVerdict
+
+
+@dataclass
+class MessageContext:
+    """Сообщение, проходящее через движок правил"""
+    text: str
+    user_id: int = 0
+    chat_id: int = 0
+    # Результат единого прохода pattern-правил, если он уже посчитан
+    pattern_hits: frozenset[str] | None = None
+    # Ответ хранилища состояния (флуд, повторы)
+    state: "StateVerdict | None" = None
+
+    @cached_property
+    def fingerprint(self) -> Fingerprint | None:
+        """Считается один раз на сообщение, при первом обращении"""
+        return Fingerprint.of(self.text)
+
+
+@dataclass
+class RuleStats:
+    calls: int = 0
+    hits: int = 0
+    total_ns: int = 0
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    Правило антиспама.
+
+    Задаётся одним из: регулярным выражением (pattern), проверкой текста (match)
+    или функцией-проверкой контекста (check). pattern и match зависят только
+    от текста и выполняются при скане, до обращения к хранилищу состояния.
+    Правила выполняются по возрастанию cost, первое сработавшее прерывает проверку.
+    """
+    name: str
+    cost: int = 1
+    pattern: str | None = None
+    check: Callable[[MessageContext], bool] | None = None
+    match: Callable[[str], bool] | None = None
+
+
+class RuleEngine:
+    """
+    Реестр правил с единым скомпилированным матчером.
+
+    Все pattern-правила собираются в одно регулярное выражение с именованными
+    группами, поэтому текст сканируется один раз, а результат переиспользуется
+    всеми pattern-правилами. match-правила выполняются в том же скане.
+    Время скана учитывается отдельно (scan_stats).
+    """
+
+    def __init__(self, rules: Iterable[Rule] = ()):
+        self._rules: list[Rule] = []
+        self._stats: dict[str, RuleStats] = {}
+        self._scan_stats = RuleStats()
+        self._matcher: re.Pattern | None = None
+        self._groups: dict[str, str] = {}
+        self._text_rules: list[Rule] = []
+        self._compiled = False
+        for rule in rules:
+            self.register(rule)
+
+    def register(self, rule: Rule) -> None:
+        if rule.name in self._stats:
+            raise ValueError(f"Правило уже зарегистрировано: {rule.name}")
+        if sum(x is not None for x in (rule.pattern, rule.check, rule.match)) != 1:
+            raise ValueError(f"Правило {rule.name} должно задавать ровно одно из pattern, match, check")
+
+        self._rules.append(rule)
+        # sort стабилен — при равной стоимости сохраняется порядок регистрации
+        self._rules.sort(key=lambda r: r.cost)
+        self._stats[rule.name] = RuleStats()
+        self._compiled = False
+
+    def compile(self) -> None:
+        self._groups = {}
+        parts = []
+        for index, rule in enumerate(r for r in self._rules if r.pattern is not None):
+            group = f"r{index}"
+            self._groups[group] = rule.name
+            parts.append(f"(?P<{group}>{rule.pattern})")
+
+        self._matcher = re.compile("|".join(parts)) if parts else None
+        self._text_rules = [r for r in self._rules if r.match is not None]
+        self._compiled = True
+
+    def scan(self, text: str) -> frozenset[str]:
+        """Один проход по тексту — имена всех сработавших pattern- и match-правил"""
+        if not self._compiled:
+            self.compile()
+        if (self._matcher is None and not self._text_rules) or not text:
+            return frozenset()
+        started = perf_counter_ns()
+        hits = set()
+        if self._matcher is not None:
+            groups = self._groups
+            hits.update(groups[m.lastgroup] for m in self._matcher.finditer(text))
+        for rule in self._text_rules:
+            if rule.match(text):
+                hits.add(rule.name)
+        hits = frozenset(hits)
+        self._scan_stats.calls += 1
+        self._scan_stats.hits += bool(hits)
+        self._scan_stats.total_ns += perf_counter_ns() - started
+        return hits
+
+    def evaluate(self, ctx: MessageContext, enabled: frozenset[str] | None = None) -> str | None:
+        """Возвращает имя первого сработавшего правила (из enabled, если задано) или None"""
+        if not self._compiled:
+            self.compile()
+
+        hits = ctx.pattern_hits
+        for rule in self._rules:
+            if enabled is not None and rule.name not in enabled:
+                continue
+            stats = self._stats[rule.name]
+            started = perf_counter_ns()
+            if rule.check is None:
+                if hits is None:
+                    hits = ctx.pattern_hits = self.scan(ctx.text)
+                matched = rule.name in hits
+            else:
+                matched = rule.check(ctx)
+            stats.total_ns += perf_counter_ns() - started
+            stats.calls += 1
+
+            if matched:
+                stats.hits += 1
+                return rule.name
+        return None
+
+    @property
+    def rules(self) -> tuple[Rule, ...]:
+        return tuple(self._rules)
+
+    @property
+    def rule_names(self) -> tuple[str, ...]:
+        return tuple(rule.name for rule in self._rules)
+
+    def stats(self) -> dict[str, RuleStats]:
+        return {name: RuleStats(s.calls, s.hits, s.total_ns) for name, s in self._stats.items()}
+
+    def scan_stats(self) -> RuleStats:
+        s = self._scan_stats
+        return RuleStats(s.calls, s.hits, s.total_ns)
+
+    def reset_stats(self) -> None:
+        for name in self._stats:
+            self._stats[name] = RuleStats()
+        self._scan_stats = RuleStats()
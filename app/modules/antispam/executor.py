@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.methods import DeleteMessages, SendMessage, TelegramMethod
+
+# Bot API удаляет не больше 100 сообщений за один deleteMessages
+MAX_DELETE_BATCH = 100
+
+
+@dataclass
+class ExecutorStats:
+    queue_depth: int
+    deleted: int
+    delete_calls: int
+    notices_sent: int
+    notices_suppressed: int
+    dropped: int
+    errors: int
+    # Действия, брошенные после того, как сессия исчерпала повторы на 429
+    gave_up: int
+    latency_avg: float
+    latency_max: float
+
+
+class ModerationExecutor:
+    """
+    Фоновое выполнение модерационных действий.
+
+    Хендлер только ставит действие в очередь и сразу возвращается.
+    Удаления копятся по чатам и уходят пачками через deleteMessages,
+    одинаковые уведомления в чате схлопываются на notice_cooldown секунд,
+    а темп вызовов и повторы после 429 обеспечивает OutboundMiddleware
+    сессии бота; если повторы исчерпаны, действие бросается.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 0.2,
+        notice_cooldown: float = 60.0,
+        max_queue: int = 10_000,
+    ):
+        self.flush_interval = flush_interval
+        self.notice_cooldown = notice_cooldown
+        self.max_queue = max_queue
+
+        self._bot: Bot | None = None
+        self._task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+        # chat_id -> [(message_id, enqueued_at)]
+        self._deletes: dict[int, list[tuple[int, float]]] = {}
+        self._notices: list[tuple[int, str, float]] = []
+        # (chat_id, key) -> время последнего уведомления
+        self._notice_sent_at: dict[tuple[int, str], float] = {}
+        self._pending = 0
+        self._closing = False
+
+        self._deleted = 0
+        self._delete_calls = 0
+        self._notices_sent = 0
+        self._notices_suppressed = 0
+        self._dropped = 0
+        self._errors = 0
+        self._gave_up = 0
+        self._latency_total = 0.0
+        self._latency_count = 0
+        self._latency_max = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending
+
+    def start(self, bot: Bot) -> None:
+        if self._task is not None:
+            return
+        self._bot = bot
+        self._closing = False
+        self._task = asyncio.create_task(self._run(), name="moderation-executor")
+
+    async def stop(self, timeout: float | None = None) -> int:
+        """
+        Останавливает фоновую задачу, отправив всё, что осталось в очереди.
+
+        Отправка ограничена timeout секундами; возвращает число брошенных действий.
+        """
+        if self._task is None:
+            return 0
+        pending = self.queue_depth
+        self._closing = True
+        self._wakeup.set()
+        task, self._task = self._task, None
+        try:
+            await asyncio.wait_for(self._drain(task), timeout)
+        except asyncio.TimeoutError:
+            pass
+        abandoned = self.queue_depth
+        logging.info(f"Модерация: выполнено {pending - abandoned} действий, брошено {abandoned}")
+        return abandoned
+
+    async def _drain(self, task: asyncio.Task) -> None:
+        await task
+        await self.flush()
+
+    def delete(self, chat_id: int, message_id: int) -> bool:
+        if self.queue_depth >= self.max_queue:
+            self._dropped += 1
+            return False
+        self._deletes.setdefault(chat_id, []).append((message_id, time.monotonic()))
+        self._pending += 1
+        self._wakeup.set()
+        return True
+
+    def notify(self, chat_id: int, text: str, key: str | None = None) -> bool:
+        """Уведомление в чат; повтор с тем же key в пределах cooldown отбрасывается"""
+        now = time.monotonic()
+        dedup_key = (chat_id, key or text)
+        sent_at = self._notice_sent_at.get(dedup_key)
+        if sent_at is not None and now - sent_at < self.notice_cooldown:
+            self._notices_suppressed += 1
+            return False
+        if self.queue_depth >= self.max_queue:
+            self._dropped += 1
+            return False
+
+        self._notice_sent_at[dedup_key] = now
+        self._notices.append((chat_id, text, now))
+        self._pending += 1
+        self._wakeup.set()
+        return True
+
+    async def _run(self) -> None:
+        while not self._closing:
+            await self._wakeup.wait()
+            if not self._closing:
+                # Небольшая пауза, чтобы удаления одного чата успели собраться в пачку
+                await asyncio.sleep(self.flush_interval)
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        if self._bot is None:
+            return
+
+        deletes, self._deletes = self._deletes, {}
+        for chat_id, queued in deletes.items():
+            for start in range(0, len(queued), MAX_DELETE_BATCH):
+                chunk = queued[start:start + MAX_DELETE_BATCH]
+                method = DeleteMessages(chat_id=chat_id, message_ids=[m for m, _ in chunk])
+                if await self._call(method):
+                    self._delete_calls += 1
+                    self._deleted += len(chunk)
+                self._pending -= len(chunk)
+                self._observe([ts for _, ts in chunk])
+
+        notices, self._notices = self._notices, []
+        for chat_id, text, enqueued_at in notices:
+            if await self._call(SendMessage(chat_id=chat_id, text=text)):
+                self._notices_sent += 1
+            self._pending -= 1
+            self._observe([enqueued_at])
+
+        self._prune_notices()
+
+    async def _call(self, method: TelegramMethod) -> bool:
+        try:
+            await self._bot(method)
+            return True
+        except TelegramRetryAfter:
+            # Сессия уже выждала retry_after и повторила вызов max_retries раз
+            self._gave_up += 1
+            logging.warning(f"Модерация: {method.__api_method__} брошен после повторов на 429")
+            return False
+        except TelegramBadRequest as e:
+            # Сообщение уже удалено или нет прав — повтор не поможет
+            logging.debug(f"Модерация: {e}")
+            return False
+        except Exception as e:
+            self._errors += 1
+            logging.error(f"Ошибка модерационного действия: {e}")
+            return False
+
+    def _observe(self, enqueued: list[float]) -> None:
+        now = time.monotonic()
+        for ts in enqueued:
+            latency = now - ts
+            self._latency_total += latency
+            self._latency_count += 1
+            self._latency_max = max(self._latency_max, latency)
+
+    def _prune_notices(self) -> None:
+        deadline = time.monotonic() - self.notice_cooldown
+        self._notice_sent_at = {k: ts for k, ts in self._notice_sent_at.items() if ts > deadline}
+
+    def stats(self) -> ExecutorStats:
+        count = self._latency_count
+        return ExecutorStats(
+            queue_depth=self.queue_depth,
+            deleted=self._deleted,
+            delete_calls=self._delete_calls,
+            notices_sent=self._notices_sent,
+            notices_suppressed=self._notices_suppressed,
+            dropped=self._dropped,
+            errors=self._errors,
+            gave_up=self._gave_up,
+            latency_avg=self._latency_total / count if count else 0.0,
+            latency_max=self._latency_max,
+        )
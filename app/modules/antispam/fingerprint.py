@@ -0,0 +1,319 @@
+import re
+import time
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from hashlib import blake2b
+from typing import Callable
+
+from .state import StoreStats
+
+_word_re = re.compile(r"\w+")
+
+SIMHASH_BITS = 64
+BANDS = 8
+BAND_BITS = SIMHASH_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+SHINGLE = 3
+# Голоса копятся в 16-битных полях; этого хватает на текст много длиннее сообщения Telegram
+MAX_FEATURES = (1 << 16) - 1
+# Голоса частых слов; промах стоит одного blake2b на триграмму слова
+WORD_CACHE_SIZE = 16_384
+
+_LANE_BITS = 16
+_LANES = int.from_bytes(b"\x00\x01" * SIMHASH_BITS, "big")
+_HIGH = int.from_bytes(b"\x80\x00" * SIMHASH_BITS, "big")
+# Число признаков лежит над полями голосов и суммируется вместе с ними
+_COUNT_SHIFT = SIMHASH_BITS * _LANE_BITS
+_BITS_TO_LANES = bytes.maketrans(b"01", b"\x00\x01")
+_LANES_TO_BITS = bytes.maketrans(b"\x00\x80", b"01")
+# Полоса — ровно байт simhash, ключ корзины — номер полосы над её значением
+_BAND_OFFSETS = [band << BAND_BITS for band in range(BANDS)]
+
+
+def _hash64(value: str) -> int:
+    # Стабильный между процессами хеш (встроенный hash() солится на запуск)
+    return int.from_bytes(blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def _spread(hash_: int) -> int:
+    """64-битный хеш, каждый разряд которого вынесен в младший байт своего 16-битного поля"""
+    lanes = bytearray(_COUNT_SHIFT // 8)
+    lanes[1::2] = format(hash_, "064b").encode().translate(_BITS_TO_LANES)
+    return int.from_bytes(lanes, "big")
+
+
+def _words(text: str) -> list[str]:
+    return _word_re.findall(unicodedata.normalize("NFKC", text).casefold())
+
+
+def normalize(text: str) -> str:
+    """Приводит текст к каноническому виду: NFKC, casefold, только слова"""
+    return " ".join(_words(text))
+
+
+def shingles(word: str) -> list[str]:
+    """Символьные триграммы слова — устойчивы к мелким правкам внутри слова"""
+    if len(word) <= SHINGLE:
+        return [word]
+    return [word[i:i + SHINGLE] for i in range(len(word) - SHINGLE + 1)]
+
+
+@lru_cache(maxsize=WORD_CACHE_SIZE)
+def _word_votes(word: str) -> int:
+    """Сумма разложенных хешей триграмм слова, над ней — их число"""
+    grams = shingles(word)
+    return sum(_spread(_hash64(gram)) for gram in grams) + (len(grams) << _COUNT_SHIFT)
+
+
+def simhash(words: list[str]) -> int:
+    """
+    64-битный simhash по триграммам всех слов текста.
+
+    Каждая триграмма голосует разрядами своего 64-битного хеша. Хеши лежат
+    по 16-битному полю на разряд, так что сумма признаков считает голоса
+    сразу во всех разрядах, а голоса слова считаются один раз и берутся
+    из кеша. Смещение переносит «голосов больше половины» в старший бит
+    поля, и результат собирается без цикла по разрядам в Python.
+    """
+    votes = sum(map(_word_votes, words))
+    features = votes >> _COUNT_SHIFT
+    while features > MAX_FEATURES:
+        # Голоса сверхдлинного текста не помещаются в поля — берётся его начало
+        words = words[:len(words) * MAX_FEATURES // features]
+        votes = sum(map(_word_votes, words))
+        features = votes >> _COUNT_SHIFT
+    bias = ((1 << _LANE_BITS - 1) - 1 - features // 2) * _LANES
+    high = ((votes + bias) & _HIGH).to_bytes(_COUNT_SHIFT // 8, "big")[::2]
+    return int(high.translate(_LANES_TO_BITS), 2)
+
+
+def band_keys(simhash_: int) -> list[int]:
+    """Ключи корзин полос: номер полосы в старших разрядах, значение полосы в младших"""
+    return list(map(int.__or__, _BAND_OFFSETS, simhash_.to_bytes(BANDS, "little")))
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    exact: int
+    simhash: int
+
+    @classmethod
+    def of(cls, text: str) -> "Fingerprint | None":
+        """Отпечаток текста или None, если после нормализации ничего не осталось"""
+        words = _words(text)
+        if not words:
+            return None
+        return cls(exact=_hash64(" ".join(words)), simhash=simhash(words))
+
+    def bands(self) -> tuple[int, ...]:
+        return tuple(self.simhash >> (i * BAND_BITS) & BAND_MASK for i in range(BANDS))
+
+    @cached_property
+    def band_keys(self) -> list[int]:
+        return band_keys(self.simhash)
+
+    def distance(self, other: "Fingerprint") -> int:
+        return (self.simhash ^ other.simhash).bit_count()
+
+
+@dataclass(frozen=True)
+class DuplicateMatch:
+    # Похожие сообщения пользователя в любых чатах, не больше repeat_limit
+    same_user: int = 0
+    # Другие аккаунты с похожим текстом в чате, не больше raid_users
+    distinct_users: int = 0
+
+
+def _append(index: dict, key: int, entry: tuple) -> None:
+    bucket = index.get(key)
+    if bucket is None:
+        index[key] = [entry]
+    else:
+        bucket.append(entry)
+
+
+def _discard(index: dict, key: int, entry: tuple) -> None:
+    # Записи в корзине идут от старых к новым; удаляется всегда самая старая запись чата
+    bucket = index.get(key)
+    if bucket and bucket[0] is entry:
+        if len(bucket) == 1:
+            del index[key]
+        else:
+            del bucket[0]
+
+
+def _collect_users(
+    bucket: list[tuple], since: float, simhash_: int, max_distance: int, users: set, limit: int
+) -> bool:
+    """Добавляет в users авторов похожих записей корзины, от новых к старым; True — набрали limit"""
+    for entry in reversed(bucket):
+        if entry[3] < since:
+            return False
+        if entry[1] not in users and (simhash_ ^ entry[0]).bit_count() <= max_distance:
+            users.add(entry[1])
+            if len(users) > limit:
+                return True
+    return False
+
+
+class _ChatScope:
+    """Записи чата по точному хешу и по полосам simhash"""
+    __slots__ = ("entries", "exact", "bands")
+
+    def __init__(self):
+        self.entries: deque[tuple] = deque()
+        self.exact: dict[int, list[tuple]] = {}
+        self.bands: dict[int, list[tuple]] = {}
+
+    def add(self, entry: tuple) -> None:
+        self.entries.append(entry)
+        _append(self.exact, entry[4], entry)
+        for key in entry[5]:
+            _append(self.bands, key, entry)
+
+    def pop_oldest(self) -> None:
+        entry = self.entries.popleft()
+        _discard(self.exact, entry[4], entry)
+        for key in entry[5]:
+            _discard(self.bands, key, entry)
+
+
+class DuplicateIndex:
+    """
+    Индекс отпечатков для поиска дубликатов и почти-дубликатов.
+
+    Повторы ищутся в истории пользователя (любые чаты): она короткая,
+    поэтому просматривается подряд от новых записей к старым до начала
+    окна или до limit. Рейды ищутся в чате: 64-битный simhash режется на
+    BANDS полос, и тексты на расстоянии Хэмминга не больше BANDS - 1 по
+    принципу Дирихле совпадают хотя бы в одной полосе. Сначала читается
+    корзина точного хеша, затем корзины полос; обход останавливается,
+    как только набралось limit аккаунтов.
+
+    Память ограничена трижды: история пользователя — user_history записей,
+    чата — chat_history, всего индекс помнит не больше max_entries
+    сообщений за window. Вытесняются самые старые записи; корзины полос
+    не обрезаются, поэтому совпадение не теряется, пока сообщение в истории.
+    """
+
+    def __init__(
+        self,
+        window: float = 3600.0,
+        max_distance: int = BANDS - 1,
+        max_entries: int = 100_000,
+        user_history: int = 64,
+        chat_history: int = 4096,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window = window
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.user_history = user_history
+        self.chat_history = chat_history
+        self._clock = clock
+        self._users: dict[int, deque[tuple]] = {}
+        self._chats: dict[int, _ChatScope] = {}
+        # Записи в порядке поступления — общая очередь вытеснения
+        self._log: deque[tuple] = deque()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def match(
+        self,
+        fp: Fingerprint,
+        user_id: int,
+        chat_id: int,
+        repeat_window: float,
+        raid_window: float,
+        repeat_limit: int,
+        raid_users: int,
+        max_distance: int | None = None,
+        now: float | None = None,
+    ) -> DuplicateMatch:
+        """Одним проходом: похожие сообщения пользователя и другие аккаунты с похожим текстом в чате"""
+        now = self._clock() if now is None else now
+        max_distance = self.max_distance if max_distance is None else max_distance
+        simhash_ = fp.simhash
+
+        same_user = 0
+        history = self._users.get(user_id)
+        if history is not None:
+            since = now - repeat_window
+            for entry in reversed(history):
+                if entry[3] < since:
+                    break
+                if (simhash_ ^ entry[0]).bit_count() <= max_distance:
+                    same_user += 1
+                    if same_user >= repeat_limit:
+                        break
+
+        distinct = 0
+        scope = self._chats.get(chat_id)
+        if scope is not None:
+            since = now - raid_window
+            users = {user_id}
+            exact = scope.exact.get(fp.exact)
+            if not (exact and _collect_users(exact, since, simhash_, max_distance, users, raid_users)):
+                for bucket in filter(None, map(scope.bands.get, fp.band_keys)):
+                    if _collect_users(bucket, since, simhash_, max_distance, users, raid_users):
+                        break
+            distinct = len(users) - 1
+
+        if same_user or distinct:
+            self._hits += 1
+        else:
+            self._misses += 1
+        return DuplicateMatch(same_user=same_user, distinct_users=distinct)
+
+    def record(self, fp: Fingerprint, user_id: int, chat_id: int, now: float | None = None) -> None:
+        now = self._clock() if now is None else now
+        # (simhash, user_id, chat_id, ts, exact, ключи полос)
+        entry = (fp.simhash, user_id, chat_id, now, fp.exact, fp.band_keys)
+
+        history = self._users.get(user_id)
+        if history is None:
+            history = self._users[user_id] = deque(maxlen=self.user_history)
+        history.append(entry)
+        scope = self._chats.get(chat_id)
+        if scope is None:
+            scope = self._chats[chat_id] = _ChatScope()
+        scope.add(entry)
+        if len(scope.entries) > self.chat_history:
+            scope.pop_oldest()
+        self._log.append(entry)
+
+        since = now - self.window
+        while self._log and self._log[0][3] < since:
+            self._drop(self._log.popleft())
+            self._expirations += 1
+        while len(self._log) > self.max_entries:
+            self._drop(self._log.popleft())
+            self._evictions += 1
+
+    def _drop(self, entry: tuple) -> None:
+        # Запись могла уже уйти из истории пользователя или чата по их лимиту
+        history = self._users.get(entry[1])
+        if history and history[0] is entry:
+            history.popleft()
+            if not history:
+                del self._users[entry[1]]
+        scope = self._chats.get(entry[2])
+        if scope and scope.entries[0] is entry:
+            scope.pop_oldest()
+            if not scope.entries:
+                del self._chats[entry[2]]
+
+    def stats(self) -> StoreStats:
+        return StoreStats(
+            size=len(self._log),
+            max_keys=self.max_entries,
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            expirations=self._expirations,
+        )
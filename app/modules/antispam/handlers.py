@@ -1,13 +1,101 @@
-from aiogram import Router, types
+from aiogram import Bot, Router, types
+from app.core.config.settings import Config
+from app.core.metrics import registry
+from .backends import create_backend
+from .executor import ModerationExecutor
+from .policy import create_policy_provider
 from .service import AntispamService
 
 router = Router()
 
+config = Config.load()
+
+# Один сервис на процесс: правила компилируются один раз
+backend = create_backend(config.antispam, config.redis)
+service = AntispamService(
+    config.antispam,
+    backend=backend,
+    policy_provider=create_policy_provider(config.antispam, backend),
+)
+
+# Удаления и уведомления выполняются в фоне, вне обработки апдейта
+executor = ModerationExecutor(
+    flush_interval=config.antispam.actions_flush_interval,
+    notice_cooldown=config.antispam.notice_cooldown,
+    max_queue=config.antispam.actions_max_queue,
+)
+
+registry.counter_func(
+    "antispam_rule_calls_total", "Проверки правил антиспама",
+    lambda: {(name,): s.calls for name, s in service.engine.stats().items()}, ("rule",),
+)
+registry.counter_func(
+    "antispam_rule_hits_total", "Срабатывания правил антиспама",
+    lambda: {(name,): s.hits for name, s in service.engine.stats().items()}, ("rule",),
+)
+registry.counter_func(
+    "antispam_rule_seconds_total", "Суммарное время правил антиспама",
+    lambda: {(name,): s.total_ns / 1e9 for name, s in service.engine.stats().items()}, ("rule",),
+)
+registry.counter_func(
+    "antispam_stage_calls_total", "Проходы общих этапов проверки: скана и хранилища",
+    lambda: {(name,): s.calls for name, s in service.stage_stats().items()}, ("stage",),
+)
+registry.counter_func(
+    "antispam_stage_seconds_total", "Суммарное время общих этапов проверки",
+    lambda: {(name,): s.total_ns / 1e9 for name, s in service.stage_stats().items()}, ("stage",),
+)
+registry.gauge(
+    "antispam_state_keys", "Ключи в хранилищах состояния антиспама",
+    lambda: {(name,): s.size for name, s in service.state_stats().items()}, ("store",),
+)
+registry.gauge("antispam_phrases", "Фразы в словаре запрещённых", lambda: service.phrases_stats().phrases)
+registry.gauge("moderation_queue_depth", "Модерационные действия в очереди", lambda: executor.queue_depth)
+registry.counter_func(
+    "moderation_actions_total", "Выполненные модерационные действия",
+    lambda: {
+        ("deleted",): (st := executor.stats()).deleted,
+        ("notices_sent",): st.notices_sent,
+        ("notices_suppressed",): st.notices_suppressed,
+        ("dropped",): st.dropped,
+        ("errors",): st.errors,
+        ("gave_up",): st.gave_up,
+    },
+    ("result",),
+)
+registry.counter_func(
+    "moderation_delete_calls_total", "Вызовы deleteMessages", lambda: executor.stats().delete_calls,
+)
+registry.gauge(
+    "moderation_latency_avg_seconds", "Среднее время от постановки действия до вызова Bot API",
+    lambda: executor.stats().latency_avg,
+)
+registry.gauge(
+    "moderation_latency_max_seconds", "Максимальное время от постановки действия до вызова Bot API",
+    lambda: executor.stats().latency_max,
+)
+
+
+@router.startup()
+async def on_startup(bot: Bot):
+    await service.phrases.start()
+    executor.start(bot)
+
+
+@router.shutdown()
+async def on_shutdown(shutdown_timeout: float | None = None):
+    await service.phrases.stop()
+    await executor.stop(shutdown_timeout)
+    # Соединения хранилища (Redis) закрываются после фоновых действий
+    await service.backend.close()
+
+
 @router.message()
 async def check_spam(message: types.Message):
-    service = AntispamService()
-    result = await service.check_message(message.text, user_id=message.from_user.id)
+    result = await service.check_message(
+        message.text, user_id=message.from_user.id, chat_id=message.chat.id
+    )
 
     if result.is_spam:
-        await message.delete()
-        await message.answer(f"🚫 Обнаружен спам ({result.rule})", reply=False)
+        executor.delete(message.chat.id, message.message_id)
+        executor.notify(message.chat.id, f"🚫 Обнаружен спам ({result.rule})", key=result.rule)
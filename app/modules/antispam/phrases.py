@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+from .fingerprint import normalize
+
+
+class PhraseMatcher:
+    """
+    Автомат Ахо — Корасик по словарю запрещённых фраз.
+
+    Фразы и текст приводятся к одному виду (normalize: NFKC, casefold, слова
+    через пробел) и обрамляются пробелами, поэтому фраза совпадает только
+    целыми словами, а домен вида free-crypto.example находится и внутри URL.
+    Поиск — один проход по тексту, время не зависит от числа фраз.
+    """
+
+    def __init__(self, phrases: Iterable[str] = ()):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # Ближайшая по суффиксным ссылкам фраза, заканчивающаяся в узле (-1 — нет)
+        self._output: list[int] = [-1]
+        self.phrases: list[str] = []
+
+        seen = set()
+        for phrase in phrases:
+            normalized = normalize(phrase)
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                self._add(f" {normalized} ")
+        self._build_links()
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    def _add(self, phrase: str) -> None:
+        node = 0
+        for char in phrase:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(-1)
+            node = next_node
+        self._output[node] = len(self.phrases)
+        self.phrases.append(phrase.strip())
+
+    def _build_links(self) -> None:
+        goto, fail, output = self._goto, self._fail, self._output
+        queue = list(goto[0].values())
+        for node in queue:
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while char not in goto[state] and state:
+                    state = fail[state]
+                fallback = goto[state].get(char, 0)
+                fail[child] = fallback if fallback != child else 0
+                if output[child] < 0:
+                    output[child] = output[fail[child]]
+
+    def search(self, text: str) -> str | None:
+        """Первая найденная фраза или None"""
+        if not self.phrases or not text:
+            return None
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in f" {normalize(text)} ":
+            while char not in goto[state] and state:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state] >= 0:
+                return self.phrases[output[state]]
+        return None
+
+    def contains(self, text: str) -> bool:
+        return self.search(text) is not None
+
+
+def read_phrases(path: Path) -> list[str]:
+    """Одна фраза или домен на строку; пустые строки и комментарии (#) пропускаются"""
+    with path.open(encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+@dataclass
+class DictionaryStats:
+    phrases: int
+    reloads: int
+    errors: int
+    build_seconds: float
+    loaded_at: float | None
+
+
+class PhraseDictionary:
+    """
+    Словарь запрещённых фраз с перезагрузкой без рестарта.
+
+    Новый автомат строится в отдельном потоке, затем одной операцией
+    подменяет текущий: проверки всегда видят либо старый словарь, либо новый.
+    При ошибке чтения остаётся прежний словарь.
+    """
+
+    def __init__(self, path: str | Path | None = None, reload_interval: float = 30.0):
+        self.path = Path(path) if path else None
+        self.reload_interval = reload_interval
+        self._matcher = PhraseMatcher()
+        self._signature: tuple[int, int] | None = None
+        self._task: asyncio.Task | None = None
+
+        self._reloads = 0
+        self._errors = 0
+        self._build_seconds = 0.0
+        self._loaded_at: float | None = None
+
+    @property
+    def matcher(self) -> PhraseMatcher:
+        return self._matcher
+
+    def search(self, text: str) -> str | None:
+        return self._matcher.search(text)
+
+    def contains(self, text: str) -> bool:
+        return self._matcher.search(text) is not None
+
+    def _file_signature(self) -> tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _build(self) -> PhraseMatcher:
+        started = time.perf_counter()
+        matcher = PhraseMatcher(read_phrases(self.path))
+        self._build_seconds = time.perf_counter() - started
+        return matcher
+
+    async def reload(self, force: bool = False) -> bool:
+        """Перестраивает словарь, если файл изменился; True — словарь подменён"""
+        if self.path is None:
+            return False
+        try:
+            signature = self._file_signature()
+            if not force and signature == self._signature:
+                return False
+            matcher = await asyncio.to_thread(self._build)
+        except Exception as e:
+            self._errors += 1
+            logging.error(f"Не удалось загрузить словарь фраз {self.path}: {e}")
+            return False
+
+        self._matcher = matcher
+        self._signature = signature
+        self._reloads += 1
+        self._loaded_at = time.time()
+        logging.info(f"Словарь фраз загружен: {len(matcher)} фраз за {self._build_seconds:.3f} с")
+        return True
+
+    async def start(self) -> None:
+        """Загружает словарь и запускает фоновую проверку изменений файла"""
+        if self.path is None or self._task is not None:
+            return
+        await self.reload()
+        self._task = asyncio.create_task(self._watch(), name="phrase-dictionary")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            await self.reload()
+
+    def stats(self) -> DictionaryStats:
+        return DictionaryStats(
+            phrases=len(self._matcher),
+            reloads=self._reloads,
+            errors=self._errors,
+            build_seconds=self._build_seconds,
+            loaded_at=self._loaded_at,
+        )
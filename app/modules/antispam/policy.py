@@ -0,0 +1,171 @@
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, replace
+from typing import Callable, Iterable
+
+from pydantic import BaseModel
+
+from app.core.config.settings import AntispamConfig
+from . import rules
+from .backends import StateBackend, Thresholds
+from .state import StateStore, StoreStats
+
+
+class PolicySettings(BaseModel):
+    """
+    Настройки антиспама чата в том виде, в каком их хранят и редактируют.
+
+    Пороги чата необязательны: None — значение по умолчанию из
+    AntispamConfig (см. from_config и merged).
+    """
+    disabled_rules: frozenset[str] = frozenset()
+    whitelisted_domains: frozenset[str] = frozenset()
+    exempt_users: frozenset[int] = frozenset()
+
+    flood_user_limit: int | None = None
+    flood_user_period: float | None = None
+    flood_chat_limit: int | None = None
+    flood_chat_period: float | None = None
+    flood_user_chat_limit: int | None = None
+    flood_user_chat_period: float | None = None
+    repeat_limit: int | None = None
+    repeat_window: float | None = None
+    raid_users: int | None = None
+    raid_window: float | None = None
+    duplicate_max_distance: int | None = None
+
+    @classmethod
+    def from_config(cls, config: AntispamConfig) -> "PolicySettings":
+        """Настройки по умолчанию: все пороги заполнены из конфига"""
+        return cls.model_validate(config.model_dump())
+
+    def merged(self, defaults: "PolicySettings") -> "PolicySettings":
+        """Настройки чата поверх defaults: незаданные пороги берутся из defaults"""
+        return defaults.model_copy(update=self.model_dump(exclude_none=True))
+
+
+@dataclass(frozen=True)
+class ChatPolicy:
+    """Скомпилированная неизменяемая политика чата"""
+    enabled: frozenset[str]
+    thresholds: Thresholds
+    whitelist: frozenset[str]
+    exempt_users: frozenset[int]
+
+    @classmethod
+    def compile(cls, settings: PolicySettings, rule_names: Iterable[str]) -> "ChatPolicy":
+        """settings — с заполненными порогами (from_config или merged)"""
+        enabled = frozenset(rule_names) - settings.disabled_rules
+        thresholds = Thresholds.from_settings(settings)
+        if "flood" not in enabled:
+            # Без лимитов хранилище не трогает бакеты флуда
+            thresholds = replace(thresholds, user=None, chat=None, user_chat=None)
+        return cls(
+            enabled=enabled,
+            thresholds=thresholds,
+            whitelist=frozenset(d.lower().removeprefix("www.") for d in settings.whitelisted_domains),
+            exempt_users=frozenset(settings.exempt_users),
+        )
+
+    @property
+    def needs_fingerprint(self) -> bool:
+        return "repeated" in self.enabled or "raid" in self.enabled
+
+    def filter_hits(self, text: str, hits: frozenset[str]) -> frozenset[str]:
+        """Убирает выключенные pattern-правила и ссылки, целиком попавшие в белый список"""
+        hits = hits & self.enabled
+        if "links" in hits and self.whitelist:
+            if all(rules.is_whitelisted(t, self.whitelist) for t in rules.link_targets(text)):
+                hits = hits - {"links"}
+        return hits
+
+
+class PolicyProvider(ABC):
+    """Источник настроек чатов"""
+
+    @abstractmethod
+    async def load(self, chat_id: int) -> PolicySettings | None:
+        pass
+
+    @abstractmethod
+    async def save(self, chat_id: int, settings: PolicySettings | None) -> None:
+        pass
+
+
+class InMemoryPolicyProvider(PolicyProvider):
+    def __init__(self, policies: dict[int, PolicySettings] | None = None):
+        self._policies = dict(policies or {})
+
+    async def load(self, chat_id: int) -> PolicySettings | None:
+        return self._policies.get(chat_id)
+
+    async def save(self, chat_id: int, settings: PolicySettings | None) -> None:
+        if settings is None:
+            self._policies.pop(chat_id, None)
+        else:
+            self._policies[chat_id] = settings
+
+
+class PolicyCache:
+    """
+    Кэш скомпилированных политик по чатам.
+
+    Политика компилируется при загрузке и живёт в кэше не дольше ttl
+    секунд, после чего перечитывается у провайдера: так изменение,
+    сделанное в другом воркере, доходит до этого не позже чем через ttl.
+    invalidate сбрасывает политику сразу, но только в своём процессе.
+    Чаты без своих настроек разделяют один экземпляр политики по умолчанию.
+    """
+
+    def __init__(
+        self,
+        provider: PolicyProvider,
+        default: PolicySettings,
+        rule_names: Iterable[str],
+        max_keys: int = 100_000,
+        ttl: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.provider = provider
+        self.rule_names = tuple(rule_names)
+        self.defaults = default
+        self.default = ChatPolicy.compile(default, self.rule_names)
+        self.ttl = ttl
+        self._clock = clock
+        # (политика, когда загружена); холодные чаты вытесняет idle-TTL того же срока
+        self._cache: StateStore[tuple[ChatPolicy, float]] = StateStore(max_keys=max_keys, ttl=ttl, clock=clock)
+
+    async def get(self, chat_id: int) -> ChatPolicy:
+        cached = self._cache.get(chat_id)
+        now = self._clock()
+        if cached is not None and now - cached[1] < self.ttl:
+            return cached[0]
+        settings = await self.provider.load(chat_id)
+        if settings is None:
+            policy = self.default
+        else:
+            policy = ChatPolicy.compile(settings.merged(self.defaults), self.rule_names)
+        self._cache.set(chat_id, (policy, now))
+        return policy
+
+    def invalidate(self, chat_id: int | None = None) -> None:
+        """Сбрасывает политику чата (или всех чатов) в этом процессе после изменения настроек"""
+        if chat_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(chat_id)
+
+    def stats(self) -> StoreStats:
+        return self._cache.stats()
+
+
+def create_policy_provider(config: AntispamConfig, backend: StateBackend) -> PolicyProvider:
+    """Настройки чатов хранятся рядом с состоянием: с backend=redis они общие для всех воркеров"""
+    if config.backend == "redis":
+        # redis нужен только для этого режима
+        from .redis_backend import RedisBackend, RedisPolicyProvider
+
+        if not isinstance(backend, RedisBackend):
+            raise ValueError("Для backend=redis политики хранятся через клиент RedisBackend")
+        return RedisPolicyProvider(backend.client, prefix=config.redis_prefix)
+    return InMemoryPolicyProvider()
@@ -0,0 +1,79 @@
+import time
+from dataclasses import dataclass
+from typing import Callable, Hashable, Mapping
+
+from .state import StateStore, StoreStats
+
+
+@dataclass(frozen=True)
+class Limit:
+    """Не больше count сообщений за period секунд"""
+    count: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.count / self.period
+
+
+class FloodLimiter:
+    """
+    Ограничитель частоты сообщений на token bucket.
+
+    Для каждого ключа хранится пара (токены, время обновления) — O(1) памяти.
+    Лимиты передаются в check отдельно для пользователя, чата и пары
+    (пользователь, чат). Сообщение проходит, только если токен есть во всех
+    бакетах; иначе не списывается ни один. Бакет без обращений дольше своего
+    period уже полон, поэтому вытеснение по idle_ttl (не меньше любого period)
+    не теряет состояние.
+    """
+
+    SCOPES = ("user_chat", "user", "chat")
+
+    def __init__(
+        self,
+        max_keys: int = 100_000,
+        shards: int = 16,
+        idle_ttl: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._clock = clock
+        self._buckets: dict[str, StateStore[tuple[float, float]]] = {
+            scope: StateStore(max_keys=max_keys, ttl=idle_ttl, shards=shards, clock=clock)
+            for scope in self.SCOPES
+        }
+        self._rejected: dict[str, int] = {scope: 0 for scope in self.SCOPES}
+
+    @staticmethod
+    def key(scope: str, user_id: int, chat_id: int) -> Hashable:
+        if scope == "user":
+            return user_id
+        if scope == "chat":
+            return chat_id
+        return user_id, chat_id
+
+    def check(
+        self, user_id: int, chat_id: int, limits: Mapping[str, Limit], now: float | None = None
+    ) -> str | None:
+        """Списывает токен и возвращает None или имя превышенного лимита"""
+        now = self._clock() if now is None else now
+        pending = []
+        for scope, limit in limits.items():
+            key = self.key(scope, user_id, chat_id)
+            bucket = self._buckets[scope]
+            tokens, updated = bucket.get(key) or (float(limit.count), now)
+            tokens = min(float(limit.count), tokens + (now - updated) * limit.rate)
+            if tokens < 1.0:
+                self._rejected[scope] += 1
+                return scope
+            pending.append((bucket, key, tokens))
+
+        for bucket, key, tokens in pending:
+            bucket.set(key, (tokens - 1.0, now))
+        return None
+
+    def rejected(self) -> dict[str, int]:
+        return dict(self._rejected)
+
+    def stats(self) -> dict[str, StoreStats]:
+        return {scope: bucket.stats() for scope, bucket in self._buckets.items()}
@@ -0,0 +1,250 @@
+import os
+from itertools import count
+from typing import Sequence
+
+from redis.asyncio import Redis
+
+from app.core.config.settings import AntispamConfig, RedisConfig
+from .backends import StateBackend, StateQuery, StateVerdict
+from .fingerprint import BANDS
+from .policy import PolicyProvider, PolicySettings
+from .ratelimit import FloodLimiter
+
+# Проверка флуда, поиск похожих отпечатков и запись — одним вызовом на сервере.
+# Время берётся из TIME Redis, чтобы у всех воркеров были одни часы,
+# либо передаётся явно при повторе истории.
+CHECK_AND_RECORD = """
+local now = tonumber(ARGV[3])
+if not now then
+    local t = redis.call('TIME')
+    now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+end
+local nf = tonumber(ARGV[1])
+local nb = tonumber(ARGV[2])
+local a = 4
+
+local flood = 0
+local buckets = {}
+for i = 1, nf do
+    local limit = tonumber(ARGV[a])
+    local period = tonumber(ARGV[a + 1])
+    a = a + 2
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or limit
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(limit, tokens + (now - ts) * limit / period)
+    if tokens < 1 then
+        flood = i
+        break
+    end
+    buckets[i] = {tokens, period}
+end
+if flood == 0 then
+    for i = 1, nf do
+        redis.call('HSET', KEYS[i], 'tokens', buckets[i][1] - 1, 'ts', now)
+        redis.call('PEXPIRE', KEYS[i], math.ceil(buckets[i][2] * 1000))
+    end
+end
+
+local same_user, distinct = 0, 0
+local repeated, raid = 0, 0
+if nb > 0 then
+    local hi = tonumber(ARGV[a])
+    local lo = tonumber(ARGV[a + 1])
+    local user = ARGV[a + 2]
+    local repeat_window = tonumber(ARGV[a + 3])
+    local raid_window = tonumber(ARGV[a + 4])
+    local repeat_limit = tonumber(ARGV[a + 5])
+    local raid_users = tonumber(ARGV[a + 6])
+    local max_distance = tonumber(ARGV[a + 7])
+    local user_history = tonumber(ARGV[a + 8])
+    local chat_history = tonumber(ARGV[a + 9])
+    local record = ARGV[a + 10] == '1'
+    local member = ARGV[a + 11]
+
+    -- Расстояние Хэмминга между 32-битными половинами; bit есть в Redis,
+    -- арифметический вариант — для Lua-заглушек без этой библиотеки
+    local function distance(x, y)
+        local c = 0
+        if bit then
+            x = bit.bxor(x, y)
+            while x ~= 0 do
+                x = bit.band(x, x - 1)
+                c = c + 1
+            end
+            return c
+        end
+        for _ = 1, 32 do
+            if x % 2 ~= y % 2 then c = c + 1 end
+            x = math.floor(x / 2)
+            y = math.floor(y / 2)
+        end
+        return c
+    end
+
+    local function similar(e)
+        local _, u, ehi, elo = string.match(e, '^([^:]+):([^:]+):([^:]+):([^:]+)$')
+        return distance(hi, tonumber(ehi)) + distance(lo, tonumber(elo)) <= max_distance, u
+    end
+
+    -- KEYS[nf + 1] — история пользователя: подряд от новых к старым до limit
+    for _, e in ipairs(redis.call('ZREVRANGEBYSCORE', KEYS[nf + 1], '+inf', now - repeat_window)) do
+        if similar(e) then
+            same_user = same_user + 1
+            if same_user >= repeat_limit then break end
+        end
+    end
+
+    -- Дальше корзина точного хеша чата и nb корзин полос; обход
+    -- останавливается, как только набралось raid_users других аккаунтов
+    local users = {[user] = true}
+    for i = nf + 2, nf + nb + 2 do
+        if distinct >= raid_users then break end
+        for _, e in ipairs(redis.call('ZREVRANGEBYSCORE', KEYS[i], '+inf', now - raid_window)) do
+            local ok, u = similar(e)
+            if ok and not users[u] then
+                users[u] = true
+                distinct = distinct + 1
+                if distinct >= raid_users then break end
+            end
+        end
+    end
+    if same_user >= repeat_limit then repeated = 1 end
+    if distinct >= raid_users then raid = 1 end
+
+    if record and flood == 0 and repeated == 0 and raid == 0 then
+        local window = math.max(repeat_window, raid_window)
+        for i = nf + 1, nf + nb + 2 do
+            local cap = i == nf + 1 and user_history or chat_history
+            redis.call('ZADD', KEYS[i], now, member)
+            redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', now - window)
+            redis.call('ZREMRANGEBYRANK', KEYS[i], 0, -(cap + 1))
+            redis.call('EXPIRE', KEYS[i], math.ceil(window))
+        end
+    end
+end
+return {flood, same_user, distinct, repeated, raid}
+"""
+
+
+class RedisBackend(StateBackend):
+    """
+    Общее для всех воркеров состояние антиспама в Redis.
+
+    Каждое сообщение — ровно один EVALSHA: все ключи передаются через KEYS,
+    поэтому скрипт совместим с Redis Cluster при общем hash tag в prefix.
+    Клиент передаётся снаружи, так что вместо Redis подойдёт любая
+    совместимая заглушка с поддержкой Lua (например, fakeredis).
+    """
+
+    def __init__(
+        self,
+        client: Redis,
+        prefix: str = "antispam",
+        user_history: int = 64,
+        chat_history: int = 4096,
+        pipeline_chunk: int = 500,
+    ):
+        self.client = client
+        self.prefix = prefix
+        self.user_history = user_history
+        self.chat_history = chat_history
+        self.pipeline_chunk = pipeline_chunk
+        self._script = client.register_script(CHECK_AND_RECORD)
+        # Уникальный id записи: pid + счётчик, без обращения к Redis
+        self._member_prefix = f"{os.getpid():x}{os.urandom(2).hex()}"
+        self._seq = count()
+
+    @classmethod
+    def from_config(cls, redis_config: RedisConfig, config: AntispamConfig) -> "RedisBackend":
+        client = Redis(host=redis_config.host, port=redis_config.port, db=redis_config.db)
+        return cls(client, prefix=config.redis_prefix)
+
+    def _flood_key(self, scope: str, user_id: int, chat_id: int) -> str:
+        key = FloodLimiter.key(scope, user_id, chat_id)
+        if isinstance(key, tuple):
+            key = f"{key[0]}:{key[1]}"
+        return f"{self.prefix}:tb:{scope}:{key}"
+
+    def _script_call(self, query: StateQuery) -> tuple[list, list, list[str]]:
+        t = query.thresholds
+        limits = t.limits
+        scopes = list(limits)
+        keys = [self._flood_key(scope, query.user_id, query.chat_id) for scope in scopes]
+        args: list = [len(scopes), 0, "" if query.timestamp is None else query.timestamp]
+        for limit in limits.values():
+            args += [limit.count, limit.period]
+
+        fp = query.fingerprint
+        if fp is not None:
+            bands = fp.bands()
+            scope = f"{self.prefix}:dup:c:{query.chat_id}"
+            keys.append(f"{self.prefix}:dup:u:{query.user_id}")
+            keys.append(f"{scope}:x:{fp.exact:x}")
+            keys += [f"{scope}:{i}:{v}" for i, v in enumerate(bands)]
+            hi, lo = fp.simhash >> 32, fp.simhash & 0xFFFFFFFF
+            member = f"{self._member_prefix}{next(self._seq):x}:{query.user_id}:{hi}:{lo}"
+            args[1] = BANDS
+            args += [
+                hi, lo, query.user_id,
+                t.repeat_window, t.raid_window, t.repeat_limit, t.raid_users, t.max_distance,
+                self.user_history, self.chat_history, int(query.record), member,
+            ]
+        return keys, args, scopes
+
+    @staticmethod
+    def _verdict(reply: list, scopes: list[str]) -> StateVerdict:
+        flood, same_user, distinct, repeated, raid = reply
+        return StateVerdict(
+            flood=scopes[flood - 1] if flood else None,
+            same_user=same_user,
+            distinct_users=distinct,
+            repeated=bool(repeated),
+            raid=bool(raid),
+        )
+
+    async def check_and_record(self, query: StateQuery) -> StateVerdict:
+        keys, args, scopes = self._script_call(query)
+        return self._verdict(await self._script(keys=keys, args=args), scopes)
+
+    async def check_and_record_many(self, queries: Sequence[StateQuery]) -> list[StateVerdict]:
+        """
+        Пачка скриптов одним конвейером.
+
+        Redis выполняет их строго по порядку, поэтому результат тот же,
+        что при последовательных вызовах, но сетевой обмен — один на чанк.
+        """
+        verdicts = []
+        for start in range(0, len(queries), self.pipeline_chunk):
+            chunk = queries[start:start + self.pipeline_chunk]
+            calls = [self._script_call(query) for query in chunk]
+            async with self.client.pipeline(transaction=False) as pipe:
+                for keys, args, _ in calls:
+                    await self._script(keys=keys, args=args, client=pipe)
+                replies = await pipe.execute()
+            verdicts += [self._verdict(reply, scopes) for reply, (_, _, scopes) in zip(replies, calls)]
+        return verdicts
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class RedisPolicyProvider(PolicyProvider):
+    """Настройки чатов в Redis — одни для всех воркеров; JSON PolicySettings на чат"""
+
+    def __init__(self, client: Redis, prefix: str = "antispam"):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, chat_id: int) -> str:
+        return f"{self.prefix}:policy:{chat_id}"
+
+    async def load(self, chat_id: int) -> PolicySettings | None:
+        raw = await self.client.get(self._key(chat_id))
+        return None if raw is None else PolicySettings.model_validate_json(raw)
+
+    async def save(self, chat_id: int, settings: PolicySettings | None) -> None:
+        if settings is None:
+            await self.client.delete(self._key(chat_id))
+        else:
+            await self.client.set(self._key(chat_id), settings.model_dump_json())
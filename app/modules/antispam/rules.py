@@ -1,8 +1,7 @@
 import re
-from datetime import datetime, timedelta
 
-# Временное хранилище для флуда (можно потом заменить на Redis)
-_user_last_msg_time: dict[int, datetime] = {}
+LINK_PATTERN = r"(https?://|t\.me/|@[\w_]+)"
+_link_re = re.compile(LINK_PATTERN)
 
 
 def contains_links(text: str) -> bool:
@@ -11,31 +10,31 @@ def contains_links(text: str) -> bool:
     """
     if not text:
         return False
-    link_pattern = re.compile(r"(https?://|t\.me/|@[\w_]+)")
-    return bool(link_pattern.search(text))
+    return bool(_link_re.search(text))
 
 
-def is_flood(user_id: int, now: datetime | None = None) -> bool:
-    """
-    Проверяет, отправляет ли пользователь слишком часто.
-    """
-    now = now or datetime.utcnow()
-    last_time = _user_last_msg_time.get(user_id)
 
-    _user_last_msg_time[user_id] = now
+# Цели ссылок: домен из URL, t.me или упоминание
+_link_target_re = re.compile(r"https?://(?:www\.)?([^\s/?#:]+)|(t\.me)/|(@[\w_]+)", re.IGNORECASE)
 
-    if last_time and now - last_time < timedelta(seconds=2):
-        return True
-    return False
+
+def link_targets(text: str) -> list[str]:
+    """
+    Возвращает цели всех ссылок в сообщении в нижнем регистре.
+    """
+    return [
+        (host or tme or mention).lower()
+        for host, tme, mention in _link_target_re.findall(text)
+    ]
 
 
-def is_repeated_text(text: str, history: list[str]) -> bool:
+def is_whitelisted(target: str, whitelist: frozenset[str]) -> bool:
     """
-    Проверяет повторяющиеся сообщения (дубликаты).
+    Проверяет цель ссылки по белому списку (домен разрешает и поддомены).
     """
-    text = text.strip().lower()
-    if not text or len(history) < 1:
+    if target in whitelist:
+        return True
+    if target.startswith("@"):
         return False
-
-    duplicates = sum(1 for msg in history if msg.lower() == text)
-    return duplicates > 2
+    parts = target.split(".")
+    return any(".".join(parts[i:]) in whitelist for i in range(1, len(parts) - 1))
@@ -1,8 +1,15 @@
 from dataclasses import dataclass
-from . import rules
+from time import perf_counter_ns
+from typing import Iterable, NamedTuple
 
-# Храним последние сообщения пользователей (можно вынести в Redis)
-_user_messages: dict[int, list[str]] = {}
+from app.core.config.settings import AntispamConfig
+from . import rules
+from .backends import MemoryBackend, StateBackend, StateQuery
+from .engine import MessageContext, Rule, RuleEngine, RuleStats
+from .fingerprint import Fingerprint
+from .phrases import DictionaryStats, PhraseDictionary
+from .policy import ChatPolicy, InMemoryPolicyProvider, PolicyCache, PolicyProvider, PolicySettings
+from .state import StoreStats
 
 
 @dataclass
@@ -11,27 +18,145 @@ class CheckResult:
     rule: str | None = None
 
 
+class MessageRecord(NamedTuple):
+    chat_id: int
+    user_id: int
+    text: str | None
+    # Время сообщения в секундах; None — текущее время хранилища
+    timestamp: float | None = None
+
+
 class AntispamService:
-    async def check_message(self, text: str, user_id: int = 0) -> CheckResult:
-        if not text:
-            return CheckResult(False)
+    def __init__(
+        self,
+        config: AntispamConfig | None = None,
+        engine: RuleEngine | None = None,
+        backend: StateBackend | None = None,
+        policy_provider: PolicyProvider | None = None,
+        phrases: PhraseDictionary | None = None,
+    ):
+        self.config = config = config or AntispamConfig()
+        self.backend = backend or MemoryBackend(config)
+        self.phrases = phrases or PhraseDictionary(
+            config.banned_phrases_path, config.banned_phrases_reload_interval
+        )
+        self._backend_stats = RuleStats()
+        self.engine = engine or self._build_engine()
+        self.engine.compile()
+        self.policies = PolicyCache(
+            provider=policy_provider or InMemoryPolicyProvider(),
+            default=PolicySettings.from_config(config),
+            rule_names=self.engine.rule_names,
+            max_keys=config.state_max_keys,
+            ttl=config.policy_cache_ttl,
+        )
+
+    def _build_engine(self) -> RuleEngine:
+        """Стандартный набор правил: от дешёвых к дорогим"""
+        return RuleEngine([
+            Rule("flood", cost=1, check=lambda ctx: ctx.state.flood is not None),
+            Rule("links", cost=2, pattern=rules.LINK_PATTERN),
+            Rule("banned", cost=2, match=self.phrases.contains),
+            Rule("repeated", cost=3, check=lambda ctx: ctx.state.repeated),
+            Rule("raid", cost=4, check=lambda ctx: ctx.state.raid),
+        ])
+
+    async def check_message(
+        self,
+        text: str,
+        user_id: int = 0,
+        chat_id: int = 0,
+        timestamp: float | None = None,
+    ) -> CheckResult:
+        results = await self.check_messages([MessageRecord(chat_id, user_id, text, timestamp)])
+        return results[0]
+
+    async def check_messages(self, batch: Iterable[MessageRecord]) -> list[CheckResult]:
+        """
+        Проверка пачки сообщений.
+
+        Результат тот же, что при вызове check_message по одному в том же порядке.
+        Скан и отпечаток считаются один раз на каждый различный текст пачки,
+        а состояние запрашивается у хранилища одним пакетом.
+        """
+        results: list[CheckResult | None] = []
+        contexts: list[tuple[int, MessageContext, ChatPolicy]] = []
+        queries: list[StateQuery] = []
+        policies: dict[int, ChatPolicy] = {}
+        # Скан и отпечаток зависят только от текста
+        scanned: dict[str, frozenset[str]] = {}
+        fingerprints: dict[str, Fingerprint | None] = {}
+
+        for chat_id, user_id, text, timestamp in batch:
+            if not text:
+                results.append(CheckResult(False))
+                continue
+
+            policy = policies.get(chat_id)
+            if policy is None:
+                policy = policies[chat_id] = await self.policies.get(chat_id)
+            if user_id in policy.exempt_users:
+                results.append(CheckResult(False))
+                continue
+
+            hits = scanned.get(text)
+            if hits is None:
+                hits = scanned[text] = self.engine.scan(text)
+            hits = policy.filter_hits(text, hits) if hits else hits
+
+            # Отпечаток не нужен, если сообщение уже попало под локальное правило
+            fingerprint = None
+            if not hits and policy.needs_fingerprint:
+                if text not in fingerprints:
+                    fingerprints[text] = Fingerprint.of(text)
+                fingerprint = fingerprints[text]
+
+            ctx = MessageContext(text=text, user_id=user_id, chat_id=chat_id, pattern_hits=hits)
+            ctx.fingerprint = fingerprint
+            contexts.append((len(results), ctx, policy))
+            results.append(None)
+            queries.append(StateQuery(
+                user_id=user_id,
+                chat_id=chat_id,
+                fingerprint=fingerprint,
+                thresholds=policy.thresholds,
+                record=not hits,
+                timestamp=timestamp,
+            ))
+
+        if queries:
+            started = perf_counter_ns()
+            verdicts = await self.backend.check_and_record_many(queries)
+            self._backend_stats.calls += len(queries)
+            self._backend_stats.total_ns += perf_counter_ns() - started
+
+            for (index, ctx, policy), verdict in zip(contexts, verdicts):
+                ctx.state = verdict
+                rule = self.engine.evaluate(ctx, policy.enabled)
+                results[index] = CheckResult(True, rule) if rule else CheckResult(False)
+
+        return results
 
-        # Правило 1: ссылки
-        if rules.contains_links(text):
-            return CheckResult(True, "links")
+    async def set_policy(self, chat_id: int, settings: PolicySettings | None) -> None:
+        """Сохраняет настройки чата (None — вернуть политику по умолчанию)"""
+        await self.policies.provider.save(chat_id, settings)
+        self.policies.invalidate(chat_id)
 
-        # Правило 2: флуд (слишком часто)
-        if rules.is_flood(user_id):
-            return CheckResult(True, "flood")
+    def stats(self) -> dict[str, RuleStats]:
+        """Срабатывания и суммарное время по каждому правилу, скану и хранилищу"""
+        return {**self.engine.stats(), **self.stage_stats()}
 
-        # Правило 3: повторяющийся текст
-        history = _user_messages.get(user_id, [])
-        if rules.is_repeated_text(text, history):
-            return CheckResult(True, "repeated")
+    def stage_stats(self) -> dict[str, RuleStats]:
+        """Общие этапы проверки: единый скан pattern-правил и запрос к хранилищу"""
+        return {
+            "scan": self.engine.scan_stats(),
+            "state": RuleStats(self._backend_stats.calls, 0, self._backend_stats.total_ns),
+        }
 
-        # Если всё чисто — запоминаем сообщение
-        _user_messages.setdefault(user_id, []).append(text)
-        if len(_user_messages[user_id]) > 10:
-            _user_messages[user_id] = _user_messages[user_id][-10:]  # храним последние 10
+    def phrases_stats(self) -> DictionaryStats:
+        return self.phrases.stats()
 
-        return CheckResult(False)
+    def state_stats(self) -> dict[str, StoreStats]:
+        stats = self.backend.stats()
+        stats["policies"] = self.policies.stats()
+        return stats
@@ -0,0 +1,126 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, TypeVar
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+@dataclass
+class StoreStats:
+    size: int
+    max_keys: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class StateStore(Generic[V]):
+    """
+    Ограниченное по памяти хранилище состояния пользователей.
+
+    Ключи распределены по шардам, каждый шард — OrderedDict в порядке последнего
+    обращения. При переполнении шарда вытесняется самый давний ключ (LRU),
+    ключи без обращений дольше ttl секунд удаляются (idle-TTL).
+    Предназначено для одного event loop: блокировок нет, каждая операция
+    трогает только свой шард и чистит его с головы за амортизированное O(1).
+    """
+
+    def __init__(
+        self,
+        max_keys: int = 100_000,
+        ttl: float = 3600.0,
+        shards: int = 16,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_keys < 1 or shards < 1:
+            raise ValueError("max_keys и shards должны быть положительными")
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self._clock = clock
+        self._shards: list[OrderedDict] = [OrderedDict() for _ in range(min(shards, max_keys))]
+        self._shard_limit = max(1, max_keys // len(self._shards))
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def _shard(self, key: Hashable) -> OrderedDict:
+        return self._shards[hash(key) % len(self._shards)]
+
+    def _expire(self, shard: OrderedDict, now: float) -> None:
+        # Ключи упорядочены по времени обращения — просроченные всегда в начале
+        deadline = now - self.ttl
+        while shard:
+            key, (_, touched) = next(iter(shard.items()))
+            if touched > deadline:
+                break
+            del shard[key]
+            self._expirations += 1
+
+    def get(self, key: Hashable, default: V | None = None) -> V | None:
+        shard = self._shard(key)
+        now = self._clock()
+        self._expire(shard, now)
+        entry = shard.get(key, _MISSING)
+        if entry is _MISSING:
+            self._misses += 1
+            return default
+
+        self._hits += 1
+        shard[key] = (entry[0], now)
+        shard.move_to_end(key)
+        return entry[0]
+
+    def set(self, key: Hashable, value: V) -> None:
+        shard = self._shard(key)
+        now = self._clock()
+        self._expire(shard, now)
+        shard[key] = (value, now)
+        shard.move_to_end(key)
+        while len(shard) > self._shard_limit:
+            shard.popitem(last=False)
+            self._evictions += 1
+
+    def setdefault(self, key: Hashable, factory: Callable[[], V]) -> V:
+        """Возвращает значение по ключу, создавая его через factory при отсутствии"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def pop(self, key: Hashable, default: V | None = None) -> V | None:
+        entry = self._shard(key).pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def sweep(self) -> None:
+        """Удаляет просроченные ключи во всех шардах"""
+        now = self._clock()
+        for shard in self._shards:
+            self._expire(shard, now)
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            shard.clear()
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def stats(self) -> StoreStats:
+        return StoreStats(
+            size=len(self),
+            max_keys=self.max_keys,
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            expirations=self._expirations,
+        )
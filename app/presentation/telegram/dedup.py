@@ -0,0 +1,135 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+    from app.core.config.settings import RedisConfig, TelegramConfig
+
+
+@dataclass
+class DedupStats:
+    checked: int
+    duplicates: int
+    size: int | None
+
+    @property
+    def duplicate_rate(self) -> float:
+        return self.duplicates / self.checked if self.checked else 0.0
+
+
+class SeenUpdates(ABC):
+    """
+    Множество недавно полученных update_id.
+
+    Telegram повторяет доставку, если вебхук ответил ошибкой или не успел
+    ответить; повтор с уже виденным update_id пропускается до обработки.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._checked = 0
+        self._duplicates = 0
+
+    async def seen(self, update_id: int) -> bool:
+        """Отмечает update_id; True — он уже встречался в пределах окна"""
+        self._checked += 1
+        if await self._mark(update_id):
+            return False
+        self._duplicates += 1
+        return True
+
+    @abstractmethod
+    async def _mark(self, update_id: int) -> bool:
+        """True — update_id новый и теперь отмечен"""
+
+    @abstractmethod
+    async def forget(self, update_id: int) -> None:
+        """Снимает отметку, чтобы повтор после ошибки обработки был принят"""
+
+    def size(self) -> int | None:
+        return None
+
+    def stats(self) -> DedupStats:
+        return DedupStats(self._checked, self._duplicates, self.size())
+
+    async def close(self) -> None:
+        pass
+
+
+class MemorySeenUpdates(SeenUpdates):
+    """
+    update_id в памяти процесса.
+
+    update_id приходят почти по возрастанию, поэтому устаревшие и лишние
+    записи вытесняются с начала OrderedDict за O(1). У обычного dict
+    удаление с начала оставляет пустые слоты, и поиск первого ключа дорожает.
+    """
+
+    def __init__(
+        self,
+        window: float = 3600.0,
+        max_size: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(window)
+        self.max_size = max_size
+        self._clock = clock
+        self._seen: OrderedDict[int, float] = OrderedDict()
+
+    async def _mark(self, update_id: int) -> bool:
+        now = self._clock()
+        seen = self._seen
+        seen_at = seen.get(update_id)
+        if seen_at is not None and now - seen_at < self.window:
+            return False
+
+        seen[update_id] = now
+        seen.move_to_end(update_id)
+        deadline = now - self.window
+        while seen and (len(seen) > self.max_size or seen[next(iter(seen))] <= deadline):
+            seen.popitem(last=False)
+        return True
+
+    async def forget(self, update_id: int) -> None:
+        self._seen.pop(update_id, None)
+
+    def size(self) -> int:
+        return len(self._seen)
+
+
+class RedisSeenUpdates(SeenUpdates):
+    """update_id в Redis — общие для всех воркеров; один SET NX PX на апдейт"""
+
+    def __init__(self, client: "Redis", prefix: str = "tg", window: float = 3600.0):
+        super().__init__(window)
+        self.client = client
+        self.prefix = prefix
+        self._ttl_ms = max(1, int(window * 1000))
+
+    def _key(self, update_id: int) -> str:
+        return f"{self.prefix}:upd:{update_id}"
+
+    async def _mark(self, update_id: int) -> bool:
+        return bool(await self.client.set(self._key(update_id), 1, nx=True, px=self._ttl_ms))
+
+    async def forget(self, update_id: int) -> None:
+        await self.client.delete(self._key(update_id))
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_seen_updates(config: "TelegramConfig", redis_config: "RedisConfig | None" = None) -> SeenUpdates:
+    if config.webhook_dedup_backend == "redis":
+        # redis нужен только для этого режима
+        from redis.asyncio import Redis
+
+        if redis_config is None:
+            raise ValueError("Для webhook_dedup_backend=redis нужна конфигурация Redis")
+        client = Redis(host=redis_config.host, port=redis_config.port, db=redis_config.db)
+        return RedisSeenUpdates(client, window=config.webhook_dedup_window)
+    return MemorySeenUpdates(window=config.webhook_dedup_window, max_size=config.webhook_dedup_max_size)
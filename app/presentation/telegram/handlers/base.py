@@ -2,36 +2,33 @@ from aiogram import Router, types
 from aiogram.filters import Command
 
 from app.application.di.container import Container
-from app.application.dto.user_dto import CreateUserDTO
-from app.application.dto.account_dto import CreateAccountDTO
-from app.domain.enums.messenger_type import MessengerType
+from app.application.dto.user_dto import UserResponseDTO
+from app.application.dto.account_dto import AccountResponseDTO
+from app.presentation.telegram.identity import Identity, IdentityCache
 from app.presentation.telegram.mappers.user_mapper import TelegramUserMapper
+from app.presentation.telegram.outbound import Priority, outbound_priority
 
 router = Router()
 
 @router.message(Command("start"))
-async def cmd_start(message: types.Message):
+async def cmd_start(
+    message: types.Message,
+    user: UserResponseDTO | None,
+    account: AccountResponseDTO | None,
+    identities: IdentityCache,
+):
     """Обработчик команды /start - регистрация пользователя"""
-    container = Container()
-    account_service = container.account_service()
-    user_service = container.user_service()
-    
     try:
-        # Сначала пытаемся найти существующего пользователя
-        existing_user = await user_service.get_user_by_external_id(
-            external_id=str(message.from_user.id),
-            messenger_type=MessengerType.TELEGRAM
-        )
-        
-        if existing_user:
-            # Пользователь существует, получаем аккаунт
-            account = await account_service.get_account(existing_user.account_id)
+        if user:
+            # Пользователь и аккаунт уже загружены IdentityMiddleware
             await message.answer(
                 f"С возвращением, {account.username or account.first_name}!\n"
                 f"Ваш аккаунт: {account.id}\n"
-                f"Пользователь: {existing_user.id}"
+                f"Пользователь: {user.id}"
             )
         else:
+            account_service = Container().account_service()
+
             # Создаем DTO для пользователя (account_id будет установлен позже)
             user_dto = TelegramUserMapper.to_create_user_dto(telegram_user=message.from_user)
             
@@ -39,39 +36,38 @@ async def cmd_start(message: types.Message):
             # Создаем DTO для аккаунта
             account_dto = TelegramUserMapper.to_create_account_dto(telegram_user=message.from_user)
             
-            # Создаем аккаунт и пользователя
-            account_dto, user_dto = await account_service.create_account_with_user(
+            # Создаем аккаунт и пользователя; повторный /start в ту же секунду
+            # получит уже созданного
+            account_dto, user_dto, created = await account_service.get_or_create_account_with_user(
                 account_dto=account_dto,
                 user_dto=user_dto
             )
+            # Следующие апдейты этого пользователя возьмут его из кэша
+            identities.remember(user_dto.external_id, Identity(user=user_dto, account=account_dto))
             
-            await message.answer(
-                f"Добро пожаловать, {account_dto.username or account_dto.first_name}!\n"
-                f"Ваш аккаунт: {account_dto.id}\n"
-                f"Пользователь: {user_dto.id}"
-            )
+            # Приветствие подождёт, если в очереди модерация
+            with outbound_priority(Priority.LOW):
+                await message.answer(
+                    f"{'Добро пожаловать' if created else 'С возвращением'}, "
+                    f"{account_dto.username or account_dto.first_name}!\n"
+                    f"Ваш аккаунт: {account_dto.id}\n"
+                    f"Пользователь: {user_dto.id}"
+                )
         
     except Exception as e:
         await message.answer("Произошла ошибка при регистрации. Попробуйте позже.")
         print(f"Error in cmd_start: {e}")
 
 @router.message(Command("profile"))
-async def cmd_profile(message: types.Message):
+async def cmd_profile(
+    message: types.Message,
+    user: UserResponseDTO | None,
+    account: AccountResponseDTO | None,
+):
     """Показать профиль пользователя"""
-    container = Container()
-    account_service = container.account_service()
-    user_service = container.user_service()
-    
     try:
-        # Ищем пользователя через user_service
-        user = await user_service.get_user_by_external_id(
-            external_id=str(message.from_user.id),
-            messenger_type=MessengerType.TELEGRAM
-        )
-        
         if user:
-            account = await account_service.get_account(user.account_id)
-            users = await user_service.get_users_by_account_id(account.id)
+            users = await Container().user_service().get_users_by_account_id(account.id)
             
             await message.answer(
                 f"Ваш профиль:\n"
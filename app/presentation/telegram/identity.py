@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import TelegramObject
+
+from app.application.dto.account_dto import AccountResponseDTO
+from app.application.dto.user_dto import UserResponseDTO
+from app.application.services.user_service import UserService
+from app.domain.enums.messenger_type import MessengerType
+from app.presentation.telegram.metrics import Handler
+
+# Аргументы хендлера, ради которых загружается отправитель
+IDENTITY_PARAMS = frozenset({"user", "account"})
+
+
+@dataclass
+class Identity:
+    user: UserResponseDTO
+    account: AccountResponseDTO
+
+
+@dataclass
+class IdentityStats:
+    size: int
+    hits: int
+    misses: int
+    coalesced: int
+    errors: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses + self.coalesced
+        return self.hits / total if total else 0.0
+
+
+class IdentityCache:
+    """
+    Общий кэш отправителей: Telegram id -> Identity или None (не зарегистрирован).
+
+    Промах стоит одного запроса к БД (пользователь и аккаунт одним join);
+    одновременные промахи по одному id ждут общий запрос. Отсутствие
+    пользователя кэшируется на короткий negative_ttl, чтобы регистрация
+    в другом воркере стала видна быстро.
+    """
+
+    def __init__(
+        self,
+        user_service: UserService,
+        ttl: float = 60.0,
+        negative_ttl: float = 5.0,
+        max_size: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.user_service = user_service
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self._clock = clock
+        # external_id -> (identity, истекает в)
+        self._entries: OrderedDict[str, tuple[Identity | None, float]] = OrderedDict()
+        self._pending: dict[str, asyncio.Task] = {}
+
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._errors = 0
+
+    async def get(self, external_id: str) -> Identity | None:
+        entry = self._entries.get(external_id)
+        if entry is not None and entry[1] > self._clock():
+            self._entries.move_to_end(external_id)
+            self._hits += 1
+            return entry[0]
+
+        task = self._pending.get(external_id)
+        if task is None:
+            self._misses += 1
+            task = self._pending[external_id] = asyncio.create_task(self._load(external_id))
+        else:
+            self._coalesced += 1
+        # Отмена одного хендлера не должна обрывать общий запрос
+        return await asyncio.shield(task)
+
+    async def _load(self, external_id: str) -> Identity | None:
+        task = asyncio.current_task()
+        try:
+            found = await self.user_service.get_identity(external_id, MessengerType.TELEGRAM)
+        except Exception:
+            self._errors += 1
+            raise
+        finally:
+            # Пока шёл запрос, запись могли обновить через remember/forget
+            current = self._pending.get(external_id) is task
+            if current:
+                del self._pending[external_id]
+        identity = Identity(*found) if found is not None else None
+        if current:
+            self._store(external_id, identity)
+        return identity
+
+    def _store(self, external_id: str, identity: Identity | None) -> None:
+        ttl = self.ttl if identity is not None else self.negative_ttl
+        self._entries[external_id] = (identity, self._clock() + ttl)
+        self._entries.move_to_end(external_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def remember(self, external_id: str, identity: Identity) -> None:
+        """Кладёт только что созданного или изменённого пользователя"""
+        self._pending.pop(external_id, None)
+        self._store(external_id, identity)
+
+    def forget(self, external_id: str) -> None:
+        self._pending.pop(external_id, None)
+        self._entries.pop(external_id, None)
+
+    def stats(self) -> IdentityStats:
+        return IdentityStats(
+            size=len(self._entries),
+            hits=self._hits,
+            misses=self._misses,
+            coalesced=self._coalesced,
+            errors=self._errors,
+        )
+
+
+class IdentityMiddleware(BaseMiddleware):
+    """
+    Внутренний middleware: передаёт хендлеру user и account отправителя.
+
+    Отправитель загружается, только если хендлер принимает эти аргументы,
+    поэтому антиспам и другие хендлеры без них не обращаются к БД. Если БД
+    недоступна, хендлер всё равно вызывается — с user и account = None,
+    чтобы пользователь получил ответ.
+    """
+
+    def __init__(self, cache: IdentityCache):
+        self.cache = cache
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        handler_object = data.get("handler")
+        if handler_object is not None and "user" not in data and IDENTITY_PARAMS & handler_object.params:
+            sender = data.get("event_from_user")
+            identity = None
+            if sender is not None:
+                try:
+                    identity = await self.cache.get(str(sender.id))
+                except Exception as e:
+                    logging.error(f"Не удалось загрузить пользователя {sender.id}: {e}")
+            data["user"] = identity.user if identity is not None else None
+            data["account"] = identity.account if identity is not None else None
+        return await handler(event, data)
+
+
+def setup_identity(dp: Dispatcher, cache: IdentityCache) -> None:
+    """Кэш доступен хендлерам как аргумент identities"""
+    dp["identities"] = cache
+    for name, observer in dp.observers.items():
+        if name not in ("update", "error"):
+            observer.middleware(IdentityMiddleware(cache))
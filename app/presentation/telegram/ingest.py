@@ -0,0 +1,138 @@
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+try:
+    # orjson заметно быстрее stdlib json на телах вебхуков; без него работаем на json
+    from orjson import loads as _loads
+except ImportError:
+    _loads = json.loads
+
+
+class InvalidUpdate(ValueError):
+    pass
+
+
+@dataclass(slots=True)
+class UpdateHeader:
+    """Поля маршрутизации апдейта, вынутые из тела без сборки pydantic-модели"""
+    update_id: int
+    update_type: str | None
+    chat_id: int | None
+    user_id: int | None
+    payload: dict[str, Any]
+
+
+def _chat_and_user(event: dict[str, Any]) -> tuple[int | None, int | None]:
+    chat = event.get("chat")
+    if chat is None:
+        # callback_query: чат в исходном сообщении
+        message = event.get("message")
+        chat = message.get("chat") if isinstance(message, dict) else None
+    user = event.get("from") or event.get("user")
+    chat_id = chat.get("id") if isinstance(chat, dict) else None
+    user_id = user.get("id") if isinstance(user, dict) else None
+    return chat_id, user_id
+
+
+def parse_header(body: bytes) -> UpdateHeader:
+    """Декодирует тело вебхука и достаёт update_id, тип апдейта, чат и отправителя"""
+    try:
+        payload = _loads(body)
+    except ValueError as e:  # JSONDecodeError обеих библиотек и UnicodeDecodeError
+        raise InvalidUpdate(f"Некорректный JSON: {e}") from None
+    if not isinstance(payload, dict) or not isinstance(payload.get("update_id"), int):
+        raise InvalidUpdate("В апдейте нет update_id")
+
+    update_type = chat_id = user_id = None
+    for key, value in payload.items():
+        # Кроме update_id в апдейте ровно одно поле — само событие
+        if key != "update_id":
+            update_type = key
+            if isinstance(value, dict):
+                chat_id, user_id = _chat_and_user(value)
+            break
+    return UpdateHeader(payload["update_id"], update_type, chat_id, user_id, payload)
+
+
+@dataclass
+class IngestStats:
+    received: int = 0
+    validated: int = 0
+    skipped: int = 0
+    invalid: int = 0
+
+
+class WebhookIngest:
+    """
+    Быстрый приём апдейтов вебхука.
+
+    Тело разбирается один раз быстрым JSON-декодером, а полная модель Update
+    строится только для типов апдейтов, на которые в диспетчере есть хендлеры.
+    Модель сразу привязывается к боту, чтобы feed_update не пересобирал её.
+    """
+
+    def __init__(self, dp: Dispatcher, bot: Bot):
+        self.dp = dp
+        self.bot = bot
+        self.update_types = frozenset(dp.resolve_used_update_types())
+        self._stats = IngestStats()
+        self._in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def in_flight(self) -> int:
+        """Апдейты, которые сейчас обрабатывает диспетчер"""
+        return self._in_flight
+
+    async def wait_idle(self, timeout: float) -> bool:
+        """Ждёт завершения всех начатых апдейтов; False — не успели за timeout"""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def parse(self, body: bytes) -> UpdateHeader:
+        self._stats.received += 1
+        try:
+            return parse_header(body)
+        except InvalidUpdate:
+            self._stats.invalid += 1
+            raise
+
+    def wants(self, header: UpdateHeader) -> bool:
+        if header.update_type in self.update_types:
+            return True
+        self._stats.skipped += 1
+        return False
+
+    def build(self, header: UpdateHeader) -> Update:
+        self._stats.validated += 1
+        return Update.model_validate(header.payload, context={"bot": self.bot})
+
+    async def dispatch(self, header: UpdateHeader) -> None:
+        self._in_flight += 1
+        self._idle.clear()
+        try:
+            await self.dp.feed_update(self.bot, self.build(header))
+        finally:
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._idle.set()
+
+    async def feed(self, body: bytes) -> UpdateHeader:
+        """Разбирает тело и передаёт апдейт диспетчеру, если он кому-то нужен"""
+        header = self.parse(body)
+        if self.wants(header):
+            await self.dispatch(header)
+        return header
+
+    def stats(self) -> IngestStats:
+        s = self._stats
+        return IngestStats(s.received, s.validated, s.skipped, s.invalid)
@@ -1,13 +1,23 @@
 from aiogram import Bot, Dispatcher
+from app.application.di.container import Container
 from app.core.config.loader import load_modules
 from app.core.config.settings import Config
 from app.presentation.telegram.handlers.base import router
+from app.presentation.telegram.identity import IdentityCache, setup_identity
+from app.presentation.telegram.outbound import create_session
 
 
 
 def create_bot(config: Config):
-    bot = Bot(token=config.telegram.bot_token)
+    # Общий пул соединений и лимиты отправки для всех вызовов Bot API
+    bot = Bot(token=config.telegram.bot_token, session=create_session(config.telegram, processes=config.web.workers))
     dp = Dispatcher()
+    setup_identity(dp, IdentityCache(
+        Container().user_service(),
+        ttl=config.telegram.identity_cache_ttl,
+        negative_ttl=config.telegram.identity_cache_negative_ttl,
+        max_size=config.telegram.identity_cache_size,
+    ))
     dp.include_router(router)
     load_modules(dp=dp)
     return bot, dp
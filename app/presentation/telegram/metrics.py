@@ -0,0 +1,60 @@
+from time import perf_counter
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.types import TelegramObject, Update
+
+from app.core.metrics import registry
+
+UPDATE_DURATION = registry.histogram(
+    "telegram_update_duration_seconds",
+    "Время обработки апдейта диспетчером, включая фильтры",
+    ("type", "handled"),
+)
+HANDLER_DURATION = registry.histogram(
+    "telegram_handler_duration_seconds",
+    "Время выполнения хендлера aiogram",
+    ("event", "handler", "outcome"),
+)
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    async def __call__(self, handler: Handler, event: Update, data: dict[str, Any]) -> Any:
+        started = perf_counter()
+        result = UNHANDLED
+        try:
+            result = await handler(event, data)
+            return result
+        finally:
+            handled = "false" if result is UNHANDLED else "true"
+            UPDATE_DURATION.observe(perf_counter() - started, (event.event_type, handled))
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Внутренний middleware: вызывается только для хендлера, прошедшего фильтры"""
+
+    def __init__(self, event_name: str):
+        self.event_name = event_name
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        started = perf_counter()
+        outcome = "error"
+        try:
+            result = await handler(event, data)
+            outcome = "ok"
+            return result
+        finally:
+            handler_object = data.get("handler")
+            name = handler_object.callback.__name__ if handler_object is not None else "unknown"
+            HANDLER_DURATION.observe(perf_counter() - started, (self.event_name, name, outcome))
+
+
+def setup_dispatcher_metrics(dp: Dispatcher) -> None:
+    """Middleware диспетчера действуют и на все вложенные роутеры"""
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    for name, observer in dp.observers.items():
+        if name not in ("update", "error"):
+            observer.middleware(HandlerMetricsMiddleware(name))
@@ -0,0 +1,310 @@
+import asyncio
+import bisect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from itertools import count
+from typing import TYPE_CHECKING, Callable, Hashable, Iterator
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+if TYPE_CHECKING:
+    from app.core.config.settings import TelegramConfig
+
+
+class Priority(IntEnum):
+    """Чем меньше значение, тем раньше вызов получает слот"""
+    MODERATION = 0
+    NORMAL = 1
+    LOW = 2
+
+
+# Модерационные методы по умолчанию идут впереди остальных
+MODERATION_METHODS = frozenset({
+    "deleteMessage", "deleteMessages", "banChatMember", "restrictChatMember",
+})
+# Лимиты на чат Telegram применяет к отправке и редактированию сообщений
+PER_CHAT_PREFIXES = ("send", "copy", "forward", "edit")
+
+_priority: ContextVar[Priority | None] = ContextVar("outbound_priority", default=None)
+
+
+@contextmanager
+def outbound_priority(priority: Priority) -> Iterator[None]:
+    """Задаёт приоритет вызовов Bot API внутри блока"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+        self.blocked_until = 0.0
+
+    def wait_time(self, now: float) -> float:
+        """Через сколько секунд появится токен (0 — уже есть)"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1.0:
+            wait = max(wait, (1.0 - self.tokens) / self.rate)
+        return wait
+
+    def take(self) -> None:
+        self.tokens -= 1.0
+
+    def idle(self, now: float) -> bool:
+        return now >= self.blocked_until and self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    chat_id: Hashable | None = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+@dataclass
+class OutboundStats:
+    queue_depth: int
+    granted: dict[str, int]
+    queue_time_avg: dict[str, float]
+    queue_time_max: float
+    retry_after: int
+    chats_tracked: int
+
+
+class OutboundScheduler:
+    """
+    Планировщик исходящих вызовов Bot API.
+
+    Общий token bucket ограничивает все вызовы с chat_id (Telegram допускает
+    около 30 сообщений в секунду на бота), бакеты чатов — отправку в один чат
+    (в личку около 1 в секунду, в группу около 20 в минуту). Ожидающие
+    вызовы получают слоты по приоритету, а внутри приоритета — по очереди;
+    вызов, упёршийся в лимит своего чата, не задерживает вызовы в другие чаты.
+    """
+
+    PRUNE_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        private_chat_rate: float = 1.0,
+        group_chat_rate: float = 20 / 60,
+        chat_burst: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.private_chat_rate = private_chat_rate
+        self.group_chat_rate = group_chat_rate
+        self.chat_burst = chat_burst
+        self._clock = clock
+        self._global = TokenBucket(global_rate, global_rate, clock())
+        self._chats: dict[Hashable, TokenBucket] = {}
+        self._waiters: list[_Waiter] = []
+        self._seq = count()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._pruned_at = clock()
+
+        self._granted = {p.name.lower(): 0 for p in Priority}
+        self._queue_time = {p.name.lower(): 0.0 for p in Priority}
+        self._queue_time_max = 0.0
+        self._retry_after = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _chat_bucket(self, chat_id: Hashable, now: float) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            # Положительные id — личные чаты, отрицательные и @username — группы и каналы
+            private = isinstance(chat_id, int) and chat_id > 0
+            rate = self.private_chat_rate if private else self.group_chat_rate
+            bucket = self._chats[chat_id] = TokenBucket(rate, self.chat_burst, now)
+        return bucket
+
+    async def acquire(self, chat_id: Hashable | None, priority: Priority) -> float:
+        """Ждёт слот; chat_id=None — только общий лимит. Возвращает время в очереди"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._pump(), name="outbound-scheduler")
+        now = self._clock()
+        waiter = _Waiter(priority, next(self._seq), chat_id, asyncio.get_running_loop().create_future(), now)
+        bisect.insort(self._waiters, waiter)
+        self._wakeup.set()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+        queued = self._clock() - now
+        name = priority.name.lower()
+        self._granted[name] += 1
+        self._queue_time[name] += queued
+        self._queue_time_max = max(self._queue_time_max, queued)
+        return queued
+
+    def pause(self, chat_id: Hashable | None, seconds: float) -> None:
+        """После 429 останавливает выдачу слотов чату (или всем) на retry_after"""
+        self._retry_after += 1
+        now = self._clock()
+        bucket = self._global if chat_id is None else self._chat_bucket(chat_id, now)
+        bucket.blocked_until = max(bucket.blocked_until, now + seconds)
+        self._wakeup.set()
+
+    async def _pump(self) -> None:
+        while True:
+            delay = self._grant()
+            if delay == 0.0:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay if delay != float("inf") else None)
+            except asyncio.TimeoutError:
+                pass
+
+    def _grant(self) -> float:
+        """Выдаёт один слот; возвращает 0 или сколько ждать до следующей попытки"""
+        if not self._waiters:
+            return float("inf")
+        now = self._clock()
+        self._prune(now)
+        delay = self._global.wait_time(now)
+        if delay > 0:
+            return delay
+
+        delay = float("inf")
+        for index, waiter in enumerate(self._waiters):
+            if waiter.chat_id is not None:
+                bucket = self._chat_bucket(waiter.chat_id, now)
+                wait = bucket.wait_time(now)
+                if wait > 0:
+                    delay = min(delay, wait)
+                    continue
+                bucket.take()
+            self._global.take()
+            del self._waiters[index]
+            if not waiter.future.done():
+                waiter.future.set_result(None)
+            return 0.0
+        return delay
+
+    def _prune(self, now: float) -> None:
+        # Полный бакет ничем не отличается от нового — его можно забыть
+        if now - self._pruned_at < self.PRUNE_INTERVAL:
+            return
+        self._pruned_at = now
+        self._chats = {k: b for k, b in self._chats.items() if not b.idle(now)}
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> OutboundStats:
+        return OutboundStats(
+            queue_depth=self.queue_depth,
+            granted=dict(self._granted),
+            queue_time_avg={
+                name: self._queue_time[name] / n if n else 0.0 for name, n in self._granted.items()
+            },
+            queue_time_max=self._queue_time_max,
+            retry_after=self._retry_after,
+            chats_tracked=len(self._chats),
+        )
+
+
+class OutboundMiddleware(BaseRequestMiddleware):
+    """Пропускает вызовы с chat_id через планировщик и повторяет их после 429"""
+
+    def __init__(self, scheduler: OutboundScheduler, max_retries: int = 2):
+        self.scheduler = scheduler
+        self.max_retries = max_retries
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        name = method.__api_method__
+        priority = _priority.get()
+        if priority is None:
+            priority = Priority.MODERATION if name in MODERATION_METHODS else Priority.NORMAL
+        scoped = chat_id if name.startswith(PER_CHAT_PREFIXES) else None
+
+        for attempt in range(self.max_retries + 1):
+            await self.scheduler.acquire(scoped, priority)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self.scheduler.pause(scoped, e.retry_after)
+                if attempt == self.max_retries:
+                    raise
+
+
+class OutboundSession(AiohttpSession):
+    """
+    Сессия Bot API с настраиваемым пулом соединений и планировщиком вызовов.
+
+    Один экземпляр на бота: все хендлеры и фоновые задачи делят пул
+    keep-alive соединений и общие лимиты отправки.
+    """
+
+    def __init__(
+        self,
+        scheduler: OutboundScheduler,
+        api: TelegramAPIServer = PRODUCTION,
+        pool_size: int = 100,
+        keepalive: float = 30.0,
+        max_retries: int = 2,
+    ):
+        super().__init__(api=api, limit=pool_size)
+        self._connector_init["keepalive_timeout"] = keepalive
+        self.scheduler = scheduler
+        self.middleware(OutboundMiddleware(scheduler, max_retries))
+
+
+def create_session(config: "TelegramConfig", processes: int = 1) -> OutboundSession:
+    """processes — число воркеров: общий лимит бота делится между ними поровну"""
+    api = TelegramAPIServer.from_base(config.bot_api_url) if config.bot_api_url else PRODUCTION
+    scheduler = OutboundScheduler(
+        global_rate=config.api_global_rate / processes,
+        private_chat_rate=config.api_private_chat_rate,
+        group_chat_rate=config.api_group_chat_rate,
+        chat_burst=config.api_chat_burst,
+    )
+    return OutboundSession(
+        scheduler,
+        api=api,
+        pool_size=config.api_pool_size,
+        keepalive=config.api_keepalive,
+        max_retries=config.api_max_retries,
+    )
@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Hashable
+
+from .ingest import UpdateHeader, WebhookIngest
+
+
+@dataclass
+class LaneStats:
+    depth: int
+    chats: int
+    processed: int
+    errors: int
+    # Возраст самого старого ожидающего апдейта, с
+    lag: float
+    wait_max: float
+
+
+@dataclass
+class QueueStats:
+    depth: int
+    max_size: int
+    workers: int
+    enqueued: int
+    rejected: int
+    processed: int
+    errors: int
+    wait_avg: float
+    wait_max: float
+    lanes: list[LaneStats]
+
+
+class Lane:
+    """
+    Последовательная полоса обработки.
+
+    Апдейты одного чата выполняются строго по порядку поступления. Внутри
+    полосы чаты обслуживаются по кругу, по одному апдейту за раз, поэтому
+    горячий чат не задерживает остальные чаты своей полосы.
+    """
+
+    def __init__(self, capacity: int, chat_capacity: int):
+        self.capacity = capacity
+        self.chat_capacity = chat_capacity
+        # chat_key -> апдейты чата в порядке поступления; порядок ключей — очередь обхода
+        self._chats: OrderedDict[Hashable, deque[tuple[UpdateHeader, float]]] = OrderedDict()
+        self._space = asyncio.Semaphore(capacity)
+        self._ready = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._depth = 0
+
+        self.processed = 0
+        self.errors = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    async def put(self, key: Hashable, header: UpdateHeader, timeout: float) -> bool:
+        pending = self._chats.get(key)
+        if pending is not None and len(pending) >= self.chat_capacity:
+            return False
+        try:
+            await asyncio.wait_for(self._space.acquire(), timeout)
+        except asyncio.TimeoutError:
+            return False
+
+        pending = self._chats.get(key)
+        if pending is None:
+            pending = self._chats[key] = deque()
+        elif len(pending) >= self.chat_capacity:
+            # Пока ждали места, чат заполнили другие продюсеры
+            self._space.release()
+            return False
+        pending.append((header, time.monotonic()))
+        self._depth += 1
+        self._idle.clear()
+        self._ready.set()
+        return True
+
+    async def get(self) -> tuple[UpdateHeader, float]:
+        while not self._chats:
+            self._ready.clear()
+            await self._ready.wait()
+        key, pending = self._chats.popitem(last=False)
+        item = pending.popleft()
+        if pending:
+            # Следующий апдейт чата встаёт в конец круга
+            self._chats[key] = pending
+        return item
+
+    def done(self) -> None:
+        self._depth -= 1
+        self._space.release()
+        if not self._depth:
+            self._idle.set()
+
+    async def join(self) -> None:
+        await self._idle.wait()
+
+    def stats(self) -> LaneStats:
+        now = time.monotonic()
+        oldest = min((pending[0][1] for pending in self._chats.values()), default=now)
+        return LaneStats(
+            depth=self._depth,
+            chats=len(self._chats),
+            processed=self.processed,
+            errors=self.errors,
+            lag=now - oldest,
+            wait_max=self.wait_max,
+        )
+
+
+class UpdateQueue:
+    """
+    Ограниченная очередь апдейтов для режима «сначала ответ».
+
+    Вебхук ставит апдейт в очередь и сразу отвечает Telegram. Апдейты
+    раскладываются по workers последовательным полосам по хешу чата:
+    каждый чат обрабатывается строго по порядку (антиспам видит сообщения
+    в исходной последовательности), а разные полосы работают параллельно.
+    У каждой полосы своя ёмкость, поэтому переполненная полоса не мешает
+    остальным. Если места нет, submit ждёт не дольше put_timeout и
+    возвращает False — вебхук отвечает 429, и Telegram повторит доставку.
+    """
+
+    def __init__(
+        self,
+        ingest: WebhookIngest,
+        workers: int = 8,
+        max_size: int = 1000,
+        put_timeout: float = 1.0,
+    ):
+        self.ingest = ingest
+        self.workers = workers
+        self.max_size = max_size
+        self.put_timeout = put_timeout
+        capacity = max(1, max_size // workers)
+        # Одному чату — не больше половины полосы, остальное соседям
+        self._lanes = [Lane(capacity, max(1, capacity // 2)) for _ in range(workers)]
+        self._tasks: list[asyncio.Task] = []
+        self._closed = False
+
+        self._enqueued = 0
+        self._rejected = 0
+
+    @property
+    def depth(self) -> int:
+        return sum(lane.depth for lane in self._lanes)
+
+    @staticmethod
+    def shard_key(header: UpdateHeader) -> Hashable:
+        """Апдейты без чата упорядочиваются по пользователю, иначе независимы"""
+        if header.chat_id is not None:
+            return header.chat_id
+        if header.user_id is not None:
+            return "user", header.user_id
+        return "update", header.update_id
+
+    def lane_for(self, key: Hashable) -> Lane:
+        return self._lanes[hash(key) % len(self._lanes)]
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._closed = False
+        self._tasks = [
+            asyncio.create_task(self._worker(lane), name=f"update-lane-{i}")
+            for i, lane in enumerate(self._lanes)
+        ]
+
+    async def stop(self, timeout: float | None = None) -> int:
+        """
+        Дожидается обработки очереди не дольше timeout и останавливает воркеров.
+
+        Возвращает число брошенных апдейтов (ожидавших и прерванных).
+        """
+        if not self._tasks:
+            return 0
+        self._closed = True
+        try:
+            await asyncio.wait_for(asyncio.gather(*(lane.join() for lane in self._lanes)), timeout)
+        except asyncio.TimeoutError:
+            pass
+        abandoned = self.depth
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        return abandoned
+
+    async def submit(self, header: UpdateHeader) -> bool:
+        """Ставит апдейт в полосу его чата; False — места не нашлось за put_timeout или очередь остановлена"""
+        key = self.shard_key(header)
+        if self._closed or not await self.lane_for(key).put(key, header, self.put_timeout):
+            self._rejected += 1
+            return False
+        self._enqueued += 1
+        return True
+
+    async def _worker(self, lane: Lane) -> None:
+        while True:
+            header, enqueued_at = await lane.get()
+            wait = time.monotonic() - enqueued_at
+            lane.wait_total += wait
+            lane.wait_max = max(lane.wait_max, wait)
+            try:
+                await self.ingest.dispatch(header)
+                lane.processed += 1
+            except Exception as e:
+                lane.errors += 1
+                logging.error(f"Ошибка обработки апдейта {header.update_id}: {e}")
+            finally:
+                lane.done()
+
+    def stats(self) -> QueueStats:
+        lanes = [lane.stats() for lane in self._lanes]
+        processed = sum(lane.processed for lane in self._lanes)
+        errors = sum(lane.errors for lane in self._lanes)
+        wait_total = sum(lane.wait_total for lane in self._lanes)
+        done = processed + errors
+        return QueueStats(
+            depth=self.depth,
+            max_size=self.max_size,
+            workers=len(self._tasks),
+            enqueued=self._enqueued,
+            rejected=self._rejected,
+            processed=processed,
+            errors=errors,
+            wait_avg=wait_total / done if done else 0.0,
+            wait_max=max((lane.wait_max for lane in lanes), default=0.0),
+            lanes=lanes,
+        )
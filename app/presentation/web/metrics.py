@@ -0,0 +1,106 @@
+from dataclasses import asdict
+from time import perf_counter
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import registry
+
+HTTP_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ("method", "route", "status"),
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware: длительность запроса по шаблону маршрута, а не по сырому пути"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_DURATION.observe(perf_counter() - started, (scope["method"], path, str(status)))
+
+
+def register_collectors(app: FastAPI) -> None:
+    """Снимает stats() компонентов приёма апдейтов и исходящих вызовов"""
+    state = app.state
+
+    # received — сумма результатов, поэтому отдельной метрикой, а не меткой
+    registry.counter_func(
+        "webhook_updates_received_total", "Апдейты, пришедшие на вебхук",
+        lambda: state.ingest.stats().received,
+    )
+    registry.counter_func(
+        "webhook_updates_total", "Апдейты, принятые вебхуком, по результату",
+        lambda: {(k,): v for k, v in asdict(state.ingest.stats()).items() if k != "received"}, ("result",),
+    )
+    registry.counter_func(
+        "webhook_duplicate_updates_total", "Повторные доставки update_id",
+        lambda: state.seen_updates.stats().duplicates,
+    )
+    registry.gauge(
+        "webhook_duplicate_rate", "Доля повторных доставок среди проверенных апдейтов",
+        lambda: state.seen_updates.stats().duplicate_rate,
+    )
+
+    def queue_stat(field: str):
+        def collect():
+            queue = state.update_queue
+            return getattr(queue.stats(), field) if queue is not None else 0
+        return collect
+
+    registry.gauge("update_queue_depth", "Апдейты в очереди режима queue", queue_stat("depth"))
+    registry.counter_func("update_queue_rejected_total", "Апдейты, отклонённые с 429", queue_stat("rejected"))
+    registry.gauge("update_queue_wait_avg_seconds", "Среднее ожидание апдейта в очереди", queue_stat("wait_avg"))
+    registry.gauge("update_queue_wait_max_seconds", "Максимальное ожидание апдейта в очереди", queue_stat("wait_max"))
+
+    def lanes(field: str):
+        def collect():
+            queue = state.update_queue
+            if queue is None:
+                return {}
+            return {(str(i),): getattr(lane, field) for i, lane in enumerate(queue.stats().lanes)}
+        return collect
+
+    registry.gauge("update_lane_depth", "Апдейты в полосе", lanes("depth"), ("lane",))
+    registry.gauge("update_lane_lag_seconds", "Возраст старейшего апдейта полосы", lanes("lag"), ("lane",))
+
+    identities = state.dp["identities"]
+    registry.gauge("identity_cache_size", "Отправители в кэше пользователей", lambda: identities.stats().size)
+    registry.counter_func(
+        "identity_cache_lookups_total", "Обращения к кэшу пользователей по результату",
+        lambda: {(k,): getattr(identities.stats(), k) for k in ("hits", "misses", "coalesced", "errors")},
+        ("result",),
+    )
+
+    scheduler = state.bot.session.scheduler
+    registry.gauge("bot_api_queue_depth", "Вызовы Bot API, ожидающие слота", lambda: scheduler.queue_depth)
+    registry.counter_func(
+        "bot_api_calls_total", "Вызовы Bot API, получившие слот, по приоритету",
+        lambda: {(k,): v for k, v in scheduler.stats().granted.items()}, ("priority",),
+    )
+    registry.gauge(
+        "bot_api_queue_time_avg_seconds", "Среднее ожидание слота по приоритету",
+        lambda: {(k,): v for k, v in scheduler.stats().queue_time_avg.items()}, ("priority",),
+    )
+    registry.counter_func("bot_api_retry_after_total", "Ответы 429 от Bot API", lambda: scheduler.stats().retry_after)
@@ -0,0 +1,41 @@
+import json
+from datetime import date
+from typing import Any, AsyncIterator, List, Mapping
+
+from fastapi.responses import StreamingResponse
+
+try:
+    # orjson сериализует datetime и Enum сам и сразу отдаёт bytes
+    from orjson import OPT_APPEND_NEWLINE, dumps as _orjson_dumps
+
+    def dumps_line(row: Mapping[str, Any]) -> bytes:
+        # RowMapping из курсора orjson не принимает, только dict
+        return _orjson_dumps(dict(row), option=OPT_APPEND_NEWLINE)
+except ImportError:
+    def _default(value: Any) -> Any:
+        if isinstance(value, date):
+            return value.isoformat()
+        return str(value)
+
+    def dumps_line(row: Mapping[str, Any]) -> bytes:
+        return (json.dumps(dict(row), default=_default, ensure_ascii=False) + "\n").encode()
+
+
+MEDIA_TYPE = "application/x-ndjson"
+
+
+async def ndjson_lines(chunks: AsyncIterator[List[Mapping[str, Any]]]) -> AsyncIterator[bytes]:
+    """Одна запись ответа на пачку строк: строки курсора сразу в JSON, без DTO"""
+    async for rows in chunks:
+        yield b"".join(dumps_line(row) for row in rows)
+
+
+def ndjson_response(chunks: AsyncIterator[List[Mapping[str, Any]]]) -> StreamingResponse:
+    """
+    Потоковый ответ NDJSON: по объекту на строку, в порядке id.
+
+    Память не зависит от размера выгрузки — в ней одна пачка строк. Если
+    соединение оборвалось, клиент продолжает с cursor = id последней
+    полученной строки.
+    """
+    return StreamingResponse(ndjson_lines(chunks), media_type=MEDIA_TYPE)
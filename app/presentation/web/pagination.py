@@ -0,0 +1,7 @@
+from typing import Annotated, Optional
+from fastapi import Query
+from app.application.dto.page_dto import MAX_PAGE_SIZE
+
+# Параметры списочных маршрутов: cursor — next_cursor предыдущей страницы
+CursorQuery = Annotated[Optional[int], Query(ge=0, description="next_cursor предыдущей страницы")]
+LimitQuery = Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE, description=f"не больше {MAX_PAGE_SIZE}")]
@@ -2,8 +2,10 @@ from fastapi import FastAPI
 from .accounts import router as acc_router
 from .telegram import router as tg_router
 from .users import router as us_router
+from .metrics import router as metrics_router
 
 def include_routers(app: FastAPI):
     app.include_router(tg_router)
     app.include_router(acc_router)
-    app.include_router(us_router)
\ No newline at end of file
+    app.include_router(us_router)
+    app.include_router(metrics_router)
\ No newline at end of file
@@ -1,19 +1,41 @@
-from typing import List, Annotated
+from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from app.application.dto.account_dto import CreateAccountDTO, AccountResponseDTO
+from app.application.dto.page_dto import DEFAULT_PAGE_SIZE, PageDTO
+from app.application.dto.user_dto import UserResponseDTO
 from app.application.services.account_service import AccountService
+from app.application.services.user_service import UserService
 from app.presentation.web.dependencies import depends
+from app.presentation.web.ndjson import MEDIA_TYPE, ndjson_response
+from app.presentation.web.pagination import CursorQuery, LimitQuery
 
 
 router = APIRouter(prefix="/accounts", tags=["Аккаунты"])
 
 AccountServiceDep = Annotated[AccountService, Depends(depends.get_accounts_service)]
+UserServiceDep = Annotated[UserService, Depends(depends.get_users_service)]
 
-@router.get("/", response_model=List[AccountResponseDTO], summary="Получить все аккаунты")  
-async def get_all_accounts(account_service: AccountServiceDep): 
-        return await account_service.get_all_accounts()
+@router.get("/", response_model=PageDTO[AccountResponseDTO], summary="Получить аккаунты постранично")  
+async def get_all_accounts(
+    account_service: AccountServiceDep,
+    cursor: CursorQuery = None,
+    limit: LimitQuery = DEFAULT_PAGE_SIZE,
+): 
+        return await account_service.get_accounts_page(after_id=cursor, limit=limit)
     
 
+# Объявлен раньше /{account_id}, иначе "export" разбирается как id
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {MEDIA_TYPE: {}}}},
+    summary="Выгрузить все аккаунты в NDJSON",
+)
+async def export_accounts(account_service: AccountServiceDep, cursor: CursorQuery = None):
+        return ndjson_response(account_service.export_accounts(after_id=cursor))
+
+
 @router.get("/{account_id}", response_model=AccountResponseDTO, summary="Получить аккаунт по ID")
 async def get_account_by_id(account_id: int, account_service: AccountServiceDep): 
         account = await account_service.get_account(account_id=account_id)
@@ -23,6 +45,15 @@ async def get_account_by_id(account_id: int, account_service: AccountServiceDep)
 
         
 
+@router.get("/{account_id}/users", response_model=PageDTO[UserResponseDTO], summary="Пользователи аккаунта")
+async def get_account_users(
+    account_id: int,
+    user_service: UserServiceDep,
+    cursor: CursorQuery = None,
+    limit: LimitQuery = DEFAULT_PAGE_SIZE,
+):
+        return await user_service.get_users_page_by_account_id(account_id, after_id=cursor, limit=limit)
+
 # Дополнительно можно добавить поиск по другим параметрам
 @router.get("/search/{username}", response_model=AccountResponseDTO, summary="Поиск по аккаунтам")
 async def get_account_by_username(username: str, account_service: AccountServiceDep): 
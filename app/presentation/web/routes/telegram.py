@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Request, Response, HTTPException, Header
 from app.core.config.settings import Config
-from aiogram.types import Update
-from app.presentation.telegram.main import create_bot
+from app.presentation.telegram.ingest import InvalidUpdate
 
 
 router = APIRouter(prefix="/webhooks", tags=["Telegram Updates"], include_in_schema=True)
@@ -14,15 +13,39 @@ async def telegram_webhook(
     request: Request,
     x_telegram_bot_api_secret_token: str = Header(None),
 ):
-    app = request.app
-    dp = app.state.dp
-    bot = app.state.bot
+    ingest = request.app.state.ingest
+    queue = request.app.state.update_queue
+    seen_updates = request.app.state.seen_updates
     # --- Проверка секретного токена ---
     if x_telegram_bot_api_secret_token != config.telegram.bot_secret_token:
         raise HTTPException(status_code=403, detail="Invalid secret token")
 
-    data = await request.json()
-    update = Update.model_validate(data)
-    await dp.feed_update(bot, update)
+    # Приложение останавливается — Telegram доставит апдейт повторно
+    if request.app.state.shutdown.started:
+        return Response(status_code=503, headers={"Retry-After": "1"})
+
+    try:
+        header = ingest.parse(await request.body())
+    except InvalidUpdate as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Повторная доставка уже принятого апдейта; апдейты без хендлеров
+    # подтверждаются без сборки модели Update
+    if not ingest.wants(header) or await seen_updates.seen(header.update_id):
+        return Response(status_code=200)
+
+    if queue is None:
+        try:
+            await ingest.dispatch(header)
+        except Exception:
+            # Пусть повтор от Telegram будет обработан заново
+            await seen_updates.forget(header.update_id)
+            raise
+        return Response(status_code=200)
+
+    # Очередь полна — Telegram повторит доставку позже
+    if not await queue.submit(header):
+        await seen_updates.forget(header.update_id)
+        return Response(status_code=429, headers={"Retry-After": "1"})
     return Response(status_code=200)
 
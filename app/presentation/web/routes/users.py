@@ -1,11 +1,15 @@
-from typing import List, Annotated
+from typing import Annotated, Optional
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from app.domain.enums.messenger_type import MessengerType
 
+from app.application.dto.page_dto import DEFAULT_PAGE_SIZE, PageDTO
 from app.application.dto.user_dto import UserResponseDTO, CreateUserDTO
 from app.application.services.user_service import UserService
 from app.application.services.account_service import AccountService
 from app.presentation.web.dependencies import depends
+from app.presentation.web.ndjson import MEDIA_TYPE, ndjson_response
+from app.presentation.web.pagination import CursorQuery, LimitQuery
 
 router = APIRouter(prefix="/users", tags=["Пользователи"])
 
@@ -13,12 +17,28 @@ UserServiceDep = Annotated[UserService, Depends(depends.get_users_service)]
 AccountServiceDep = Annotated[AccountService, Depends(depends.get_accounts_service)]
 
 
-@router.get("/", response_model=List[UserResponseDTO], summary="Получить пользователей по мессенджеру")
+@router.get("/", response_model=PageDTO[UserResponseDTO], summary="Получить пользователей по мессенджеру")
 async def get_all_users(
     messenger: MessengerType,
-    user_service: UserServiceDep
+    user_service: UserServiceDep,
+    cursor: CursorQuery = None,
+    limit: LimitQuery = DEFAULT_PAGE_SIZE,
+):
+    return await user_service.get_users_page_by_messenger_type(messenger, after_id=cursor, limit=limit)
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {MEDIA_TYPE: {}}}},
+    summary="Выгрузить пользователей в NDJSON",
+)
+async def export_users(
+    user_service: UserServiceDep,
+    messenger: Optional[MessengerType] = None,
+    cursor: CursorQuery = None,
 ):
-    return await user_service.get_users_by_messenger_type(messenger)
+    return ndjson_response(user_service.export_users(messenger, after_id=cursor))
 
 
 @router.post("/", response_model=UserResponseDTO, summary="Создать пользователя")
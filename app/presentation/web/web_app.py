@@ -1,24 +1,66 @@
+import asyncio
 import logging
+from app.core.config.logging import setup_logging
 from app.core.config.settings import Config
+from app.core.runtime import LeaderLock, ShutdownDeadline
+from app.infrastructure.db.session import dispose_engine, init_engine
 from fastapi import FastAPI
 from app.presentation.telegram.main import create_bot
+from app.presentation.telegram.dedup import create_seen_updates
+from app.presentation.telegram.ingest import WebhookIngest
+from app.presentation.telegram.metrics import setup_dispatcher_metrics
+from app.presentation.telegram.queue import UpdateQueue
+from app.presentation.web.metrics import MetricsMiddleware, register_collectors
 from app.presentation.web.routes import include_routers
 from aiogram.types import ChatAdministratorRights
 
+# Как часто неведущий воркер пытается перехватить регистрацию вебхука
+LEADER_RETRY_INTERVAL = 5.0
 
 
 async def create_app(config: Config) -> FastAPI:
+    return build_app(config)
+
+
+def app_factory() -> FastAPI:
+    '''Точка входа uvicorn (factory=True) для каждого воркера'''
+    config = Config.load()
+    setup_logging(level=logging.DEBUG if config.env.debug else logging.INFO)
+    return build_app(config)
+
+
+def build_app(config: Config) -> FastAPI:
     app = FastAPI(root_path="/tgbot", title="Chatty")    
 
+    # Движок и пул БД процесса (при нескольких воркерах — свой в каждом)
+    init_engine(config.db)
     bot, dp = create_bot(config=config)
+    setup_dispatcher_metrics(dp)
     app.state.bot = bot
     app.state.dp = dp
+    app.state.ingest = ingest = WebhookIngest(dp, bot)
+    app.state.seen_updates = create_seen_updates(config.telegram, config.redis)
+    # В режиме queue апдейты обрабатываются пулом воркеров после ответа Telegram
+    app.state.update_queue = None
+    if config.telegram.webhook_mode == "queue":
+        app.state.update_queue = UpdateQueue(
+            ingest,
+            workers=config.telegram.webhook_workers,
+            max_size=config.telegram.webhook_queue_size,
+            put_timeout=config.telegram.webhook_ack_timeout,
+        )
+    # Вебхук один на бота: регистрирует его только ведущий процесс
+    multiprocess = config.web.workers > 1
+    app.state.leader = leader = LeaderLock(config.web.leader_lock if multiprocess else None)
+    app.state.leader_task = None
+    # Отсчёт идёт с сигнала остановки; с этого момента новые апдейты не принимаются
+    app.state.shutdown = shutdown_deadline = ShutdownDeadline(config.web.shutdown_timeout)
 
     include_routers(app)
-    
-    @app.on_event("startup")
-    async def startup():
-        '''Операции выпоняемые при запуске'''
+    app.add_middleware(MetricsMiddleware)
+    register_collectors(app)
+
+    async def register_webhook():
         rights = ChatAdministratorRights(
             is_anonymous=False,
             can_manage_chat=True,
@@ -38,19 +80,65 @@ async def create_app(config: Config) -> FastAPI:
         )
         await bot.set_webhook(
             url=config.telegram.bot_webhooks_url,
-            drop_pending_updates=True,
+            drop_pending_updates=config.telegram.webhook_drop_pending,
             secret_token=config.telegram.bot_secret_token,
         )
         await bot.set_my_default_administrator_rights(rights)
         logging.info(f"Установлен url для wehooks: {config.telegram.bot_webhooks_url}")
-        
 
-        
+    async def wait_for_leadership():
+        # Ведущий завершился — его место занимает первый успевший воркер
+        while not leader.try_acquire():
+            await asyncio.sleep(LEADER_RETRY_INTERVAL)
+        logging.info("Воркер стал ведущим")
+        await register_webhook()
+
+    @app.on_event("startup")
+    async def startup():
+        '''Операции выпоняемые при запуске'''
+        # uvicorn уже поставил свои обработчики сигналов — оборачиваем их
+        shutdown_deadline.watch_signals()
+        await dp.emit_startup(bot=bot)
+        if app.state.update_queue is not None:
+            app.state.update_queue.start()
+        if leader.try_acquire():
+            await register_webhook()
+        else:
+            app.state.leader_task = asyncio.create_task(wait_for_leadership())
+
     @app.on_event("shutdown")
     async def shutdown():
-        '''Операции выполныемые при остановке'''
-        await bot.delete_webhook()
+        '''
+        Операции выполныемые при остановке.
+
+        Новые апдейты не принимаются с момента сигнала. Начатые дорабатываются
+        в пределах того, что осталось от web.shutdown_timeout после ожидания
+        соединений в uvicorn, затем закрываются сессия бота и пул БД.
+        '''
+        remaining = shutdown_deadline.remaining
+        if app.state.leader_task is not None:
+            app.state.leader_task.cancel()
+        # С несколькими воркерами остальные продолжают принимать апдейты
+        if leader.is_leader and not multiprocess:
+            await bot.delete_webhook()
+            logging.info("Удалены вебхуки")
+
+        queue = app.state.update_queue
+        pending = ingest.in_flight + (queue.depth if queue is not None else 0)
+        abandoned = 0
+        if queue is not None:
+            abandoned = await queue.stop(remaining())
+        # Апдейты, которые обрабатываются прямо в запросах вебхука (режим sync)
+        if not await ingest.wait_idle(remaining()):
+            abandoned += ingest.in_flight
+        logging.info(f"Остановка: обработано {pending - abandoned} апдейтов, брошено {abandoned}")
+
+        # Хендлеры остановки дописывают отложенное (модерацию) в пределах оставшегося времени
+        await dp.emit_shutdown(bot=bot, shutdown_timeout=remaining())
+        await app.state.seen_updates.close()
         await bot.session.close()
-        logging.info("Удалены вебхуки")
+        await bot.session.scheduler.close()
+        await dispose_engine()
+        leader.release()
 
     return app
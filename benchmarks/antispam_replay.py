@@ -0,0 +1,145 @@
+"""
+Бенчмарк антиспама: прогон синтетического корпуса через AntispamService.
+
+Работает офлайн, без токена бота. Результат — JSON, чтобы сравнивать релизы:
+
+    python -m benchmarks.antispam_replay --count 50000 --output bench.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict
+from pathlib import Path
+
+from app.core.config.settings import AntispamConfig
+from app.modules.antispam.service import AntispamService, MessageRecord
+from benchmarks import corpus
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def replay_single(service: AntispamService, records: list[MessageRecord]) -> list[float]:
+    """По одному сообщению, как в хендлере; возвращает задержки в секундах"""
+    latencies = []
+    clock = time.perf_counter
+    for record in records:
+        started = clock()
+        await service.check_message(record.text, record.user_id, record.chat_id, record.timestamp)
+        latencies.append(clock() - started)
+    return latencies
+
+
+async def replay_batch(service: AntispamService, records: list[MessageRecord], size: int) -> list[float]:
+    """Пачками через check_messages; задержки — на пачку"""
+    latencies = []
+    clock = time.perf_counter
+    for start in range(0, len(records), size):
+        started = clock()
+        await service.check_messages(records[start:start + size])
+        latencies.append(clock() - started)
+    return latencies
+
+
+async def measure_state_memory(config: AntispamConfig, records: list[MessageRecord]) -> dict:
+    """Отдельный прогон под tracemalloc: он заметно замедляет код и портил бы тайминги"""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    service = AntispamService(config)
+    await service.check_messages(records)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "state_bytes": current - baseline,
+        "peak_bytes": peak - baseline,
+        "stores": {name: asdict(s) for name, s in service.state_stats().items()},
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    if args.corpus:
+        records = corpus.load(Path(args.corpus))
+    else:
+        records = list(corpus.generate(
+            count=args.count, chats=args.chats, users=args.users, seed=args.seed,
+        ))
+
+    config = AntispamConfig()
+    service = AntispamService(config)
+
+    started = time.perf_counter()
+    if args.batch > 1:
+        latencies = await replay_batch(service, records, args.batch)
+    else:
+        latencies = await replay_single(service, records)
+    elapsed = time.perf_counter() - started
+
+    # Правила плюс "scan" (общий regex) и "state" (обращения к хранилищу)
+    costs = {}
+    for name, stats in service.stats().items():
+        costs[name] = {
+            "calls": stats.calls,
+            "hits": stats.hits,
+            "total_ms": stats.total_ns / 1e6,
+            "avg_ns": stats.total_ns / stats.calls if stats.calls else 0.0,
+        }
+
+    latencies.sort()
+    report = {
+        "benchmark": "antispam_replay",
+        "python": platform.python_version(),
+        "messages": len(records),
+        "mode": "batch" if args.batch > 1 else "single",
+        "batch_size": args.batch,
+        "seconds": elapsed,
+        "messages_per_sec": len(records) / elapsed if elapsed else 0.0,
+        "latency_unit": "batch" if args.batch > 1 else "message",
+        "latency_p50_us": percentile(latencies, 0.50) * 1e6,
+        "latency_p99_us": percentile(latencies, 0.99) * 1e6,
+        "latency_max_us": (latencies[-1] if latencies else 0.0) * 1e6,
+        "rules": costs,
+    }
+    if not args.skip_memory:
+        report["memory"] = await measure_state_memory(config, records)
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк AntispamService на синтетическом корпусе")
+    parser.add_argument("--count", type=int, default=50_000)
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--batch", type=int, default=1, help="размер пачки check_messages, 1 — по одному")
+    parser.add_argument("--corpus", help="JSONL-корпус вместо генерации")
+    parser.add_argument("--save-corpus", help="сохранить сгенерированный корпус в JSONL")
+    parser.add_argument("--skip-memory", action="store_true", help="не замерять память состояния")
+    parser.add_argument("--output", help="файл для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    if args.save_corpus:
+        records = list(corpus.generate(count=args.count, chats=args.chats, users=args.users, seed=args.seed))
+        corpus.save(records, Path(args.save_corpus))
+        args.corpus = args.save_corpus
+
+    report = asyncio.run(run(args))
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(payload + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Генератор синтетического корпуса чатов для бенчмарков антиспама.
+
+Корпус детерминирован (seed) и смешивает обычную переписку, спам ссылками,
+флуд, рейды одинаковым текстом с мелкими вариациями и текст с тяжёлым Unicode.
+"""
+import json
+import random
+from pathlib import Path
+from typing import Iterator
+
+from app.modules.antispam.service import MessageRecord
+
+WORDS = (
+    "привет как дела что нового сегодня завтра встреча проект код релиз "
+    "hello team meeting today tomorrow deploy review merge branch issue "
+    "кофе обед погода отлично спасибо вопрос ответ идея план задача"
+).split()
+
+SPAM_LINKS = (
+    "https://free-crypto.example/bonus",
+    "http://t.me/cheap_followers",
+    "t.me/joinchat/AAAAspam",
+    "@best_signals_bot",
+)
+
+RAID_TEMPLATES = (
+    "Заработок от {n}000$ в неделю без вложений, пиши в лс",
+    "Join our VIP channel for free signals every day {n}",
+    "🔥 Только сегодня скидка {n}0% на всё, переходи в профиль 🔥",
+)
+
+UNICODE_SAMPLES = (
+    "Ｆｕｌｌｗｉｄｔｈ ｔｅｘｔ ｈｅｒｅ",
+    "z̴̢a̷̛l̸̡g̵̕o̶̧ ̷t̸e̵x̶t̷",
+    "emoji 😀😃😄😁😆😅🤣😂🙂🙃😉😊😇 party 🎉🎉🎉",
+    "مرحبا بالجميع كيف الحال",
+    "日本語のテキストとカタカナ",
+    "é vs é — NFC vs NFD",
+)
+
+SCENARIOS = ("normal", "links", "flood", "raid", "unicode")
+DEFAULT_MIX = {"normal": 0.6, "links": 0.1, "flood": 0.1, "raid": 0.1, "unicode": 0.1}
+# Среднее число сообщений в одном эпизоде сценария
+EPISODE_SIZE = {"flood": 17.5, "raid": 35.0}
+
+
+def _normal_text(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 20)))
+
+
+def _vary(rng: random.Random, text: str) -> str:
+    """Мелкие правки, которыми спамеры обходят точное сравнение"""
+    variants = (
+        lambda t: t + "!" * rng.randint(1, 3),
+        lambda t: t.upper(),
+        lambda t: t.replace(" ", "  ", 1),
+        lambda t: t + " " + rng.choice("🙂🔥👍"),
+        lambda t: t,
+    )
+    return rng.choice(variants)(text)
+
+
+def generate(
+    count: int = 100_000,
+    chats: int = 50,
+    users: int = 5_000,
+    seed: int = 1,
+    mix: dict[str, float] | None = None,
+    rate: float = 200.0,
+) -> Iterator[MessageRecord]:
+    """
+    Выдаёт count сообщений с временем в секундах от начала корпуса.
+
+    mix задаёт долю сообщений (а не эпизодов) каждого сценария.
+    rate — средняя частота сообщений в секунду по всем чатам.
+    """
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    scenarios = tuple(mix)
+    weights = [mix[s] / EPISODE_SIZE.get(s, 1.0) for s in scenarios]
+    now = 0.0
+    produced = 0
+
+    while produced < count:
+        scenario = rng.choices(scenarios, weights)[0]
+        chat_id = -1_000_000 - rng.randrange(chats)
+
+        if scenario == "flood":
+            user_id = rng.randrange(users)
+            burst = rng.randint(5, 30)
+            messages = [(user_id, _normal_text(rng)) for _ in range(burst)]
+            step = 0.1
+        elif scenario == "raid":
+            template = rng.choice(RAID_TEMPLATES)
+            text = template.format(n=rng.randint(1, 9))
+            accounts = rng.randint(10, 60)
+            messages = [(users + rng.randrange(users), _vary(rng, text)) for _ in range(accounts)]
+            step = 0.5
+        elif scenario == "links":
+            text = f"{_normal_text(rng)} {rng.choice(SPAM_LINKS)}"
+            messages = [(rng.randrange(users), text)]
+            step = 1.0 / rate
+        elif scenario == "unicode":
+            text = f"{rng.choice(UNICODE_SAMPLES)} {_normal_text(rng)}"
+            messages = [(rng.randrange(users), text)]
+            step = 1.0 / rate
+        else:
+            messages = [(rng.randrange(users), _normal_text(rng))]
+            step = 1.0 / rate
+
+        for user_id, text in messages:
+            if produced >= count:
+                return
+            now += rng.expovariate(1.0 / step)
+            produced += 1
+            yield MessageRecord(chat_id=chat_id, user_id=user_id, text=text, timestamp=round(now, 6))
+
+
+def save(records: list[MessageRecord], path: Path) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record._asdict(), ensure_ascii=False) + "\n")
+
+
+def load(path: Path) -> list[MessageRecord]:
+    with path.open(encoding="utf-8") as f:
+        return [MessageRecord(**json.loads(line)) for line in f if line.strip()]
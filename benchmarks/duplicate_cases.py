@@ -0,0 +1,126 @@
+"""
+Регрессия поиска повторов и рейдов на заданных случаях.
+
+Каждый случай — последовательность сообщений в один чат. Сообщения
+прогоняются через MemoryBackend с порогами по умолчанию, и для каждого
+случая сверяется, сработали ли repeated и raid. Если хоть один случай
+разошёлся с ожиданием, скрипт печатает отчёт и завершается с кодом 1.
+
+    python -m benchmarks.duplicate_cases
+
+Главный случай — общий длинный префикс с разными хвостами: отпечаток
+строится по всему тексту, поэтому такие вопросы не должны считаться
+ни повтором, ни рейдом, а настоящие рассылки с мелкими правками — должны.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from dataclasses import dataclass
+
+from app.core.config.settings import AntispamConfig
+from app.modules.antispam.backends import MemoryBackend, StateQuery, Thresholds
+from app.modules.antispam.fingerprint import Fingerprint
+
+PREFIX = "Добрый день коллеги подскажите пожалуйста "
+QUESTIONS = (
+    "как настроить деплой на staging после обновления раннера",
+    "где взять доступ к базе отчётов за прошлый квартал",
+    "кто отвечает за ревью миграций в платёжном сервисе",
+    "почему ночная сборка падает на тестах интеграции с банком",
+    "можно ли перенести созвон по релизу на четверг",
+    "какой формат логов ожидает новый сборщик метрик",
+    "есть ли инструкция по ротации ключей в хранилище секретов",
+)
+RAID = "Заработок от 5000$ в неделю без вложений, пиши в лс"
+CASE_STEP = 10.0
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    # (user_id, текст) в порядке отправки, по сообщению в CASE_STEP секунд
+    messages: tuple[tuple[int, str], ...]
+    repeated: bool
+    raid: bool
+
+
+CASES = (
+    Case(
+        "shared_prefix.many_users",
+        tuple((100 + i, PREFIX + question) for i, question in enumerate(QUESTIONS)),
+        repeated=False,
+        raid=False,
+    ),
+    Case(
+        "shared_prefix.one_user",
+        tuple((100, PREFIX + question) for question in QUESTIONS),
+        repeated=False,
+        raid=False,
+    ),
+    Case(
+        "raid.near_duplicates",
+        tuple(
+            (200 + i, variant)
+            for i, variant in enumerate((
+                RAID, RAID.upper(), RAID + "!!!", RAID.replace("5000", "7000"),
+                "🔥 " + RAID, RAID.replace("пиши", "пишите"), RAID + " срочно",
+            ))
+        ),
+        repeated=False,
+        raid=True,
+    ),
+    Case(
+        "repeated.near_duplicates",
+        tuple((300, variant) for variant in (RAID, RAID + "!!", RAID.replace("неделю", "день"), RAID.upper())),
+        repeated=True,
+        raid=False,
+    ),
+)
+
+
+async def run_case(case: Case) -> dict:
+    backend = MemoryBackend(AntispamConfig())
+    # Флуд здесь не проверяется: случаи про отпечатки
+    thresholds = Thresholds()
+    repeated = raid = False
+    for i, (user_id, text) in enumerate(case.messages):
+        verdict = await backend.check_and_record(StateQuery(
+            user_id=user_id,
+            chat_id=-1,
+            fingerprint=Fingerprint.of(text),
+            thresholds=thresholds,
+            timestamp=i * CASE_STEP,
+        ))
+        repeated |= verdict.repeated
+        raid |= verdict.raid
+    return {
+        "case": case.name,
+        "repeated": repeated,
+        "raid": raid,
+        "ok": (repeated, raid) == (case.repeated, case.raid),
+    }
+
+
+async def run() -> list[dict]:
+    return [await run_case(case) for case in CASES]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Проверка повторов и рейдов на заданных случаях")
+    parser.add_argument("--output", help="файл для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run())
+    report = json.dumps({"benchmark": "duplicate_cases", "cases": results}, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    else:
+        print(report)
+    if not all(result["ok"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
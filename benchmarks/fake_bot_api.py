@@ -0,0 +1,157 @@
+"""
+Локальный поддельный Bot API для нагрузочных тестов без api.telegram.org.
+
+Принимает вызовы вида POST /bot<token>/<method>, записывает их и отвечает
+правдоподобным результатом. Задержка и доля ошибок (429 или 400) задаются
+параметрами. Бот направляется сюда через TG_BOT_API_URL:
+
+    python -m benchmarks.fake_bot_api --port 8081 --latency 0.05 --error-rate 0.01
+    TG_BOT_API_URL=http://127.0.0.1:8081 python main.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+
+
+@dataclass
+class FakeBotAPIStats:
+    calls: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)
+    started_at: float = field(default_factory=time.monotonic)
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": dict(self.calls),
+            "errors": dict(self.errors),
+            "total_calls": sum(self.calls.values()),
+            "uptime": time.monotonic() - self.started_at,
+        }
+
+
+class FakeBotAPI:
+    """
+    Поддельный Bot API.
+
+    latency — базовая задержка ответа в секундах, jitter — случайная добавка
+    к ней. error_rate — доля вызовов, завершающихся ошибкой: половина из них
+    отвечает 429 с retry_after, остальные — 400.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after: int = 1,
+        seed: int | None = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.stats = FakeBotAPIStats()
+        self._rng = random.Random(seed)
+        self._message_ids = 0
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        app.router.add_get("/stats", self.handle_stats)
+        app.router.add_post("/stats/reset", self.handle_reset)
+        return app
+
+    async def _params(self, request: web.Request) -> dict:
+        if request.content_type == "application/json":
+            return await request.json()
+        params = {}
+        for key, value in (await request.post()).items():
+            # aiogram передаёт вложенные объекты JSON-строками внутри формы
+            if isinstance(value, str) and value[:1] in "[{":
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    pass
+            params[key] = value
+        return params
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = await self._params(request)
+        self.stats.calls[method] += 1
+
+        delay = self.latency + (self._rng.random() * self.jitter if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if self.error_rate and self._rng.random() < self.error_rate:
+            if self._rng.random() < 0.5:
+                self.stats.errors[f"{method}:429"] += 1
+                return web.json_response({
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                }, status=429)
+            self.stats.errors[f"{method}:400"] += 1
+            return web.json_response({
+                "ok": False, "error_code": 400, "description": "Bad Request: injected error",
+            }, status=400)
+
+        return web.json_response({"ok": True, "result": self._result(method, params)})
+
+    def _result(self, method: str, params: dict):
+        lowered = method.lower()
+        if lowered == "getme":
+            return BOT_USER
+        if lowered in ("sendmessage", "editmessagetext"):
+            self._message_ids += 1
+            chat_id = params.get("chat_id", 0)
+            return {
+                "message_id": params.get("message_id") or self._message_ids,
+                "date": int(time.time()),
+                "chat": {"id": int(chat_id), "type": "private" if int(chat_id) > 0 else "supergroup"},
+                "from": BOT_USER,
+                "text": params.get("text", ""),
+            }
+        return True
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats.as_dict())
+
+    async def handle_reset(self, request: web.Request) -> web.Response:
+        self.stats = FakeBotAPIStats()
+        return web.json_response({"ok": True})
+
+
+async def serve(api: FakeBotAPI, host: str = "127.0.0.1", port: int = 8081) -> web.AppRunner:
+    """Запускает сервер в текущем event loop; остановка — await runner.cleanup()"""
+    runner = web.AppRunner(api.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Поддельный Bot API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    api = FakeBotAPI(args.latency, args.jitter, args.error_rate, args.retry_after)
+    web.run_app(api.app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Нагрузочный тест вебхука целиком: create_app + поддельный Bot API, офлайн.
+
+Поднимает в одном процессе поддельный Bot API и приложение (uvicorn),
+шлёт синтетические апдейты на /webhooks/ с заданной частотой (открытая
+модель нагрузки) и печатает JSON: пропускную способность, перцентили
+задержки ответа вебхука, время до полной обработки и вызовы Bot API.
+
+    python -m benchmarks.webhook_load --rate 500 --count 10000 --mode queue
+
+По умолчанию БД — временный SQLite; модели используют функции Postgres,
+поэтому /start там падает с ошибкой. Для нагрузки на БД задайте DB_URL
+с Postgres (переменные окружения приоритетнее значений по умолчанию).
+С --target нагрузка идёт на уже запущенное приложение (его бот должен
+смотреть в поддельный Bot API через TG_BOT_API_URL).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import aiohttp
+
+from benchmarks import corpus
+from benchmarks.fake_bot_api import FakeBotAPI, serve
+from benchmarks.webhook_parse import FAKE_TOKEN
+
+SECRET = "loadtest-secret"
+
+
+def _user(user_id: int) -> dict:
+    return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "language_code": "ru"}
+
+
+def make_updates(count: int, seed: int = 1, start_share: float = 0.01) -> list[bytes]:
+    """Сообщения групп из корпуса антиспама и немного /start в личке"""
+    rng = random.Random(seed)
+    bodies = []
+    for update_id, record in enumerate(corpus.generate(count=count, seed=seed), start=1):
+        user_id = record.user_id + 1
+        if rng.random() < start_share:
+            chat = {"id": user_id, "type": "private", "first_name": f"User{user_id}"}
+            text = "/start"
+            entities = [{"type": "bot_command", "offset": 0, "length": 6}]
+        else:
+            chat = {"id": record.chat_id, "type": "supergroup", "title": f"Chat {record.chat_id}"}
+            text = record.text
+            entities = None
+        message = {
+            "message_id": update_id,
+            "from": _user(user_id),
+            "chat": chat,
+            "date": 1_700_000_000 + int(record.timestamp or 0),
+            "text": text,
+        }
+        if entities:
+            message["entities"] = entities
+        bodies.append(json.dumps({"update_id": update_id, "message": message}, ensure_ascii=False).encode())
+    return bodies
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def send_load(url: str, bodies: list[bytes], rate: float, concurrency: int) -> dict:
+    """Шлёт апдейты по расписанию i / rate, не дожидаясь ответов на предыдущие"""
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    limit = asyncio.Semaphore(concurrency)
+    headers = {"Content-Type": "application/json", "X-Telegram-Bot-Api-Secret-Token": SECRET}
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def post(body: bytes) -> None:
+            async with limit:
+                started = time.perf_counter()
+                try:
+                    async with session.post(url, data=body, headers=headers) as response:
+                        await response.read()
+                        statuses[response.status] += 1
+                except aiohttp.ClientError as e:
+                    statuses[type(e).__name__] += 1
+                latencies.append(time.perf_counter() - started)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        tasks = []
+        for i, body in enumerate(bodies):
+            delay = started + i / rate - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(post(body)))
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - started
+
+    latencies.sort()
+    return {
+        "sent": len(bodies),
+        "seconds": elapsed,
+        "requests_per_sec": len(bodies) / elapsed if elapsed else 0.0,
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "latency_p50_ms": percentile(latencies, 0.50) * 1e3,
+        "latency_p90_ms": percentile(latencies, 0.90) * 1e3,
+        "latency_p99_ms": percentile(latencies, 0.99) * 1e3,
+        "latency_max_ms": (latencies[-1] if latencies else 0.0) * 1e3,
+    }
+
+
+def configure_env(args: argparse.Namespace, workdir: Path) -> None:
+    """Окружение для Config.load: вызывать до импорта модулей приложения"""
+    defaults = {
+        "TG_BOT_TOKEN": FAKE_TOKEN,
+        "TG_BOT_SECRET_TOKEN": SECRET,
+        "TG_BOT_ID": "1",
+        "TG_BOT_WEBHOOKS_URL": f"http://{args.host}:{args.app_port}/webhooks/",
+        "TG_BOT_API_URL": f"http://{args.host}:{args.api_port}",
+        "TG_WEBHOOK_MODE": args.mode,
+        "DB_URL": f"sqlite+aiosqlite:///{workdir / 'load.db'}",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+
+async def start_app(args: argparse.Namespace):
+    import uvicorn
+
+    from app.core.config.settings import Config
+    from app.infrastructure.db.models import BaseModel
+    from app.infrastructure.db.session import get_engine
+    from app.presentation.web.web_app import create_app
+
+    async with get_engine().begin() as conn:
+        await conn.run_sync(BaseModel.metadata.create_all)
+
+    app = await create_app(Config.load())
+    server = uvicorn.Server(uvicorn.Config(
+        app, host=args.host, port=args.app_port, log_level="warning", log_config=None,
+    ))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.05)
+    return app, server, task
+
+
+async def wait_drained(app, timeout: float) -> float:
+    """Ждёт, пока очередь апдейтов и фоновые модерационные действия опустеют"""
+    from app.modules.antispam.handlers import executor
+
+    started = time.perf_counter()
+    queue = app.state.update_queue
+    while time.perf_counter() - started < timeout:
+        if (queue is None or queue.depth == 0) and executor.queue_depth == 0:
+            break
+        await asyncio.sleep(0.01)
+    return time.perf_counter() - started
+
+
+async def run(args: argparse.Namespace) -> dict:
+    bodies = make_updates(args.count, args.seed, args.start_share)
+    api = FakeBotAPI(args.latency, args.jitter, args.error_rate, seed=args.seed)
+    runner = await serve(api, args.host, args.api_port)
+
+    app = server = task = None
+    try:
+        if args.target:
+            url = args.target
+        else:
+            app, server, task = await start_app(args)
+            url = f"http://{args.host}:{args.app_port}/webhooks/"
+
+        api.stats.calls.clear()
+        load = await send_load(url, bodies, args.rate, args.concurrency)
+        drain = await wait_drained(app, args.drain_timeout) if app is not None else 0.0
+        outbound = api.stats.as_dict()
+        report = {
+            "benchmark": "webhook_load",
+            "python": platform.python_version(),
+            "mode": os.environ.get("TG_WEBHOOK_MODE", args.mode),
+            "target_rate": args.rate,
+            **load,
+            "drain_seconds": drain,
+            "processed_per_sec": len(bodies) / (load["seconds"] + drain) if bodies else 0.0,
+            "outbound": {"calls": outbound["calls"], "errors": outbound["errors"]},
+        }
+        if app is not None:
+            report["ingest"] = vars(app.state.ingest.stats())
+            report["dedup"] = vars(app.state.seen_updates.stats())
+        return report
+    finally:
+        if server is not None:
+            server.should_exit = True
+            await task
+        await runner.cleanup()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест вебхука с поддельным Bot API")
+    parser.add_argument("--count", type=int, default=5_000)
+    parser.add_argument("--rate", type=float, default=500.0, help="апдейтов в секунду")
+    parser.add_argument("--concurrency", type=int, default=100, help="одновременных запросов")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--start-share", type=float, default=0.01, help="доля команд /start")
+    parser.add_argument("--mode", choices=("sync", "queue"), default="sync")
+    parser.add_argument("--latency", type=float, default=0.02, help="задержка Bot API, с")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--app-port", type=int, default=18080)
+    parser.add_argument("--api-port", type=int, default=18081)
+    parser.add_argument("--target", help="URL вебхука уже запущенного приложения")
+    parser.add_argument("--drain-timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="файл для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_env(args, Path(workdir))
+        report = asyncio.run(run(args))
+
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(payload + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Бенчмарк приёма вебхуков: прежний путь (json + Update.model_validate для
+каждого апдейта и пересборка в feed_update) против WebhookIngest.
+
+Диспетчер не вызывается — меряется только разбор тела. Результат — JSON:
+
+    python -m benchmarks.webhook_parse --count 20000 --output parse.json
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Update
+
+from app.presentation.telegram.ingest import WebhookIngest
+
+# Токен нужного формата; к Bot API бенчмарк не обращается
+FAKE_TOKEN = "123456:" + "A" * 35
+
+UPDATE_TYPES = ("message", "edited_message", "callback_query", "chat_member", "my_chat_member")
+DEFAULT_MIX = {"message": 0.7, "edited_message": 0.1, "callback_query": 0.05,
+               "chat_member": 0.1, "my_chat_member": 0.05}
+
+
+def _user(user_id: int) -> dict:
+    return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "language_code": "ru"}
+
+
+def _chat(chat_id: int) -> dict:
+    return {"id": chat_id, "type": "supergroup", "title": f"Chat {chat_id}"}
+
+
+def _message(rng: random.Random, message_id: int, chat_id: int, user_id: int) -> dict:
+    return {
+        "message_id": message_id,
+        "from": _user(user_id),
+        "chat": _chat(chat_id),
+        "date": 1_700_000_000 + message_id,
+        "text": "привет всем, как дела? " * rng.randint(1, 5),
+        "entities": [{"type": "bold", "offset": 0, "length": 6}],
+    }
+
+
+def _member(chat_id: int, user_id: int) -> dict:
+    return {
+        "chat": _chat(chat_id),
+        "from": _user(user_id),
+        "date": 1_700_000_000,
+        "old_chat_member": {"status": "left", "user": _user(user_id)},
+        "new_chat_member": {"status": "member", "user": _user(user_id)},
+    }
+
+
+def make_bodies(count: int, seed: int = 1, mix: dict[str, float] | None = None) -> list[bytes]:
+    """Тела вебхуков в том виде, в каком их присылает Telegram"""
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    kinds, weights = zip(*mix.items())
+    bodies = []
+    for update_id in range(1, count + 1):
+        kind = rng.choices(kinds, weights)[0]
+        chat_id = -1_000_000 - rng.randrange(50)
+        user_id = rng.randrange(1, 5_000)
+        if kind in ("message", "edited_message"):
+            event = _message(rng, update_id, chat_id, user_id)
+        elif kind == "callback_query":
+            event = {
+                "id": str(update_id),
+                "from": _user(user_id),
+                "chat_instance": "1",
+                "data": "page:2",
+                "message": _message(rng, update_id, chat_id, user_id),
+            }
+        else:
+            event = _member(chat_id, user_id)
+        bodies.append(json.dumps({"update_id": update_id, kind: event}).encode())
+    return bodies
+
+
+def build_dispatcher(update_types: list[str]) -> Dispatcher:
+    dp = Dispatcher()
+    router = Router()
+
+    async def handler(event) -> None:
+        pass
+
+    for update_type in update_types:
+        router.observers[update_type].register(handler)
+    dp.include_router(router)
+    return dp
+
+
+def run_legacy(bot: Bot, bodies: list[bytes]) -> float:
+    started = time.perf_counter()
+    for body in bodies:
+        update = Update.model_validate(json.loads(body))
+        # feed_update пересобирает апдейт, не привязанный к боту
+        if update.bot != bot:
+            Update.model_validate(update.model_dump(), context={"bot": bot})
+    return time.perf_counter() - started
+
+
+def run_ingest(ingest: WebhookIngest, bodies: list[bytes]) -> float:
+    started = time.perf_counter()
+    for body in bodies:
+        header = ingest.parse(body)
+        if ingest.wants(header):
+            ingest.build(header)
+    return time.perf_counter() - started
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Сравнение разбора вебхуков")
+    parser.add_argument("--count", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--handled", nargs="+", default=["message"], choices=UPDATE_TYPES,
+                        help="типы апдейтов, на которые есть хендлеры")
+    parser.add_argument("--output", help="файл для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    bodies = make_bodies(args.count, args.seed)
+    bot = Bot(token=FAKE_TOKEN)
+    ingest = WebhookIngest(build_dispatcher(args.handled), bot)
+
+    legacy = run_legacy(bot, bodies)
+    fast = run_ingest(ingest, bodies)
+    stats = ingest.stats()
+
+    report = {
+        "benchmark": "webhook_parse",
+        "python": platform.python_version(),
+        "updates": len(bodies),
+        "handled_types": sorted(ingest.update_types),
+        "validated": stats.validated,
+        "skipped": stats.skipped,
+        "legacy_us_per_update": legacy / len(bodies) * 1e6,
+        "ingest_us_per_update": fast / len(bodies) * 1e6,
+        "speedup": legacy / fast if fast else 0.0,
+    }
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(payload + "\n")
+
+
+if __name__ == "__main__":
+    main()
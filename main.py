@@ -3,6 +3,7 @@ import logging
 import uvicorn
 from app.core.config.logging import setup_logging
 from app.core.config.settings import Config
+from app.core.runtime import check_workers
 from app.presentation.web.web_app import create_app
 
 
@@ -25,13 +26,37 @@ async def main():
         log_config=None,
         reload=config.env.debug,
         use_colors=False,  
+        # Тот же бюджет, что у хука остановки: оба считают от сигнала (ShutdownDeadline)
+        timeout_graceful_shutdown=config.web.shutdown_timeout,
     )
     server = uvicorn.Server(uvicorn_config)
     await server.serve()
 
 
+def run_workers(config: Config):
+    """Несколько процессов за одним портом; каждый собирает приложение сам через app_factory"""
+    check_workers(config)
+    log_level = logging.DEBUG if config.env.debug else logging.INFO
+    setup_logging(level=log_level)
+    logging.info(f"🚀 Запуск {config.web.workers} воркеров в режиме {config.env.env.upper()}")
+    uvicorn.run(
+        "app.presentation.web.web_app:app_factory",
+        factory=True,
+        host=config.web.host,
+        port=config.web.port,
+        workers=config.web.workers,
+        timeout_graceful_shutdown=config.web.shutdown_timeout,
+        log_level=log_level,
+        log_config=None,
+        use_colors=False,
+    )
+
+
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        if Config.load().web.workers > 1:
+            run_workers(Config.load())
+        else:
+            asyncio.run(main())
     except (KeyboardInterrupt, SystemExit):
         logging.info("❌ Сервер остановлен вручную")